@@ -2,22 +2,29 @@ import dash
 from dash import dcc, html
 import pandas as pd
 import dash_bootstrap_components as dbc
-from build import get_data
+from flask import jsonify
+from build import fetch_stats, startup_timings
+from data_context import DataStore, DataRefresher
 from page import page
 from components.navbar import Navbar
 from flask_caching import Cache
+import diskcache
+from storage import CACHE_DIR
+import os
 
 # Import all callback modules
-from callbacks.player_callbacks import register_player_callbacks
+from callbacks.player_callbacks import register_player_callbacks, figure_cache
 from callbacks.comparison_callbacks import register_comparison_callbacks
 from callbacks.team_callbacks import register_team_callbacks
 from callbacks.gameweek_callbacks import register_gameweek_callbacks
 from callbacks.navigation_callbacks import register_navigation_callbacks
 from callbacks.ai_advisor_callbacks import register_ai_advisor_callbacks
 
-# Load data
+# Load data; the refresher swaps in a new data set when the gameweek deadline rolls over
 df = pd.DataFrame()
-bet_df, players_df, fixtures_df, gameweek, history, teams_df, all_history_df = get_data()
+data = DataStore()
+data.reload()
+DataRefresher(data).start()
 pag = page()
 
 # Setup layout components
@@ -33,22 +40,44 @@ def Homepage():
     return layout
 
 # Initialize Dash app
-app = dash.Dash(__name__, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.CYBORG])
+# Background callbacks (e.g. loading a team) run as jobs in worker processes queued through a disk cache
+JOBS_DIR = os.environ.get('FPL_JOBS_DIR', os.path.join(CACHE_DIR, 'jobs'))
+background_callback_manager = dash.DiskcacheManager(diskcache.Cache(JOBS_DIR), expire=3600)
+
+app = dash.Dash(__name__, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.CYBORG],
+                background_callback_manager=background_callback_manager)
 app.title = 'FPL Data'
 app._favicon = "icon/favicon.ico"
 app.layout = Homepage()
 server = app.server
-cache = Cache(app.server, config={'CACHE_TYPE': 'simple'})
+
+# Per-session comparison state has to be visible to every worker, so it lives on disk by default
+# (FPL_SESSION_CACHE_TYPE=RedisCache with FPL_SESSION_CACHE_REDIS_URL to share it across hosts)
+cache_config = {
+    'CACHE_TYPE': os.environ.get('FPL_SESSION_CACHE_TYPE', 'FileSystemCache'),
+    'CACHE_DEFAULT_TIMEOUT': int(os.environ.get('FPL_SESSION_CACHE_TTL', 3600)),
+    'CACHE_DIR': os.environ.get('FPL_SESSION_CACHE_DIR', os.path.join(CACHE_DIR, 'sessions')),
+    'CACHE_THRESHOLD': int(os.environ.get('FPL_SESSION_CACHE_THRESHOLD', 5000)),
+}
+if 'FPL_SESSION_CACHE_REDIS_URL' in os.environ:
+    cache_config['CACHE_REDIS_URL'] = os.environ['FPL_SESSION_CACHE_REDIS_URL']
+cache = Cache(app.server, config=cache_config)
 
 # Register all callbacks
-register_player_callbacks(app, players_df, all_history_df, cache)
-register_comparison_callbacks(app, players_df, cache)
-register_team_callbacks(app, players_df, gameweek)
-register_gameweek_callbacks(app, players_df, teams_df, all_history_df)
-register_navigation_callbacks(app, players_df, teams_df, bet_df, gameweek)
+register_player_callbacks(app, data, cache)
+register_comparison_callbacks(app, data, cache)
+register_team_callbacks(app, data)
+register_gameweek_callbacks(app, data)
+register_navigation_callbacks(app, data)
 
 # Register AI Advisor callbacks with AWS Lambda endpoint
 register_ai_advisor_callbacks(app)
 
+@server.route('/status')
+def status():
+    """Current data version, reload timings and fetch cache counters for this worker"""
+    return jsonify({'data': data.status(), 'startup_timings': startup_timings, 'fetch': fetch_stats(),
+                    'figure_cache': figure_cache.stats()})
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=8051)
\ No newline at end of file
@@ -0,0 +1,123 @@
+// Draws the gameweek review pitch and substitutes in the browser from the lineup stores
+// (home-players-data / away-players-data, column-wise PITCH_FIELDS, see callbacks/gameweek_callbacks.py).
+// Builds the same component tree as position_row / sub_card there, and fills the player stats modal from the
+// element-keyed game-data store.
+(function () {
+    var IMAGE_URL_PREFIX = 'https://resources.premierleague.com/premierleague25/photos/players/110x140/';
+
+    // players of one store row ('1'-'4' or 'sub') as {element, photo, points}, in store order
+    function playersIn(store, row) {
+        var players = [];
+        for (var i = 0; i < store.row.length; i++) {
+            if (store.row[i] === row) {
+                players.push({element: store.element[i], photo: store.photo[i], points: store.points[i]});
+            }
+        }
+        return players;
+    }
+
+    function component(type, props) {
+        return {namespace: 'dash_html_components', type: type, props: props};
+    }
+
+    function playerImage(player) {
+        return component('Img', {
+            src: IMAGE_URL_PREFIX + player.photo + '.png',
+            id: {type: 'player-image', player_id: player.element},
+            style: {'border-radius': '100%', height: '50px', width: '50px'}
+        });
+    }
+
+    function positionRow(players) {
+        return component('Div', {
+            children: players.map(function (player) {
+                return component('Div', {children: [
+                    playerImage(player),
+                    component('P', {children: player.points, style: {color: 'white'}})
+                ]});
+            }),
+            style: {textAlign: 'center'}
+        });
+    }
+
+    function subCard(player) {
+        return component('Div', {
+            children: [
+                playerImage(player),
+                component('P', {children: player.points, style: {color: 'white', margin: '5px 0'}})
+            ],
+            style: {textAlign: 'center', margin: '5px'}
+        });
+    }
+
+    function subsColumn(title, players) {
+        return component('Div', {
+            children: [
+                component('H6', {children: title, style: {color: 'white', marginBottom: '10px', textAlign: 'center'}}),
+                component('Div', {
+                    children: players.map(subCard),
+                    style: {display: 'flex', justifyContent: 'center', flexWrap: 'wrap', gap: '8px', minWidth: '400px'}
+                })
+            ],
+            style: {width: '48%', minWidth: '450px'}
+        });
+    }
+
+    // modal lines after the player's name, in display order
+    var STAT_LABELS = [
+        ['total_points', 'Total Points'], ['minutes', 'Minutes'], ['goals_scored', 'Goals'],
+        ['assists', 'Assists'], ['saves', 'Saves'], ['clean_sheets', 'Clean Sheets'],
+        ['yellow_cards', 'Yellow Cards'], ['red_cards', 'Red Cards'], ['bonus', 'Bonus'],
+        ['expected_goals', 'Expected Goals'], ['expected_assists', 'Expected Assists']
+    ];
+
+    function statsContent(fields, values) {
+        var stats = {};
+        fields.forEach(function (field, i) { stats[field] = values[i]; });
+        var children = [component('H5', {children: stats.web_name == null ? 'Unknown' : stats.web_name})];
+        STAT_LABELS.forEach(function (stat) {
+            var value = stats[stat[0]] == null ? 0 : stats[stat[0]];
+            children.push(component('P', {children: stat[1] + ': ' + value}));
+        });
+        return component('Div', {children: children});
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        gameweek_review: {
+            render_pitch: function (home, away) {
+                if (!home || !away) {
+                    return Array(9).fill(window.dash_clientside.no_update);
+                }
+                var subs = component('Div', {
+                    children: [subsColumn('Home Substitutes', playersIn(home, 'sub')),
+                               subsColumn('Away Substitutes', playersIn(away, 'sub'))],
+                    style: {display: 'flex', justifyContent: 'space-between', alignItems: 'flex-start', flexWrap: 'wrap'}
+                });
+                return [
+                    positionRow(playersIn(home, '1')), positionRow(playersIn(home, '2')),
+                    positionRow(playersIn(home, '3')), positionRow(playersIn(home, '4')),
+                    positionRow(playersIn(away, '4')), positionRow(playersIn(away, '3')),
+                    positionRow(playersIn(away, '2')), positionRow(playersIn(away, '1')),
+                    subs
+                ];
+            },
+
+            show_player_stats: function (imageClicks, closeClicks, gameData) {
+                var ctx = window.dash_clientside.callback_context;
+                var trigger = ctx.triggered_id;
+                if (!trigger || trigger === 'close-modal') {
+                    return [false, ''];
+                }
+                // a freshly drawn pitch registers its images with no clicks; only a real click opens the modal
+                if (!ctx.triggered[0].value) {
+                    return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+                }
+                var values = gameData && gameData.players[String(trigger.player_id)];
+                if (!values) {
+                    return [true, 'Player data not found'];
+                }
+                return [true, statsContent(gameData.fields, values)];
+            }
+        }
+    });
+})();
@@ -1,6 +1,6 @@
 import json
 import pandas as pd
-import requests
+from http_client import get_json
 import boto3 
 import io
 from datetime import datetime
@@ -479,8 +479,7 @@ def get_df(bucket, key):
 
 
 def get(url):
-    response = requests.get(url, verify=False)
-    return json.loads(response.content)
+    return get_json(url)
 
 
 def get_gameweek():
@@ -1,9 +1,17 @@
-import requests
 import pandas  as pd
+import numpy as np
 import json
 from datetime import datetime
-import boto3
+from storage import get_storage
+from http_client import get_json, flights
+import response_cache
+import live_points
+import codecs
 import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from lineups import LINEUPS_FILE
+from history_columns import HISTORY_FIELDS, HistoryTable, concat_columns, history_columns, stored_columns
 
 cum_columns = ['minutes',
        'goals_scored', 'assists', 'clean_sheets', 'goals_conceded',
@@ -13,61 +21,200 @@ cum_columns = ['minutes',
        'expected_goal_involvements', 'expected_goals_conceded', 'value',
        'transfers_balance', 'selected', 'transfers_in', 'transfers_out']
 
-s3_client = boto3.client('s3')
+BUCKET_NAME = "fpl-bucket-2025"
+PLAYER_DATA_FILE = 'player_data.json'
+# The collector's gameweek-partitioned history; its manifest is written after the partitions
+HISTORY_PREFIX = 'player_history'
+HISTORY_MANIFEST = HISTORY_PREFIX + '/manifest.json'
 
-def get_data():
-    today = datetime.now().timestamp()
-    
-    players =  get('https://fantasy.premierleague.com/api/bootstrap-static/')
-    teams_df = pd.DataFrame(players['teams'])
-    fixtures_df = pd.DataFrame(players['events'])
-    fixtures_df = fixtures_df.loc[fixtures_df.deadline_time_epoch>today]
-    gameweek =  fixtures_df.iloc[0].id
-
-    key = "odds-gameweek-" +str(gameweek) +".csv"
-    bucket_name = "fpl-bucket-2025"
-    bet_df = get_df(bucket_name, key)
-
-    key = "players-gameweek-" +str(gameweek) +".csv"
-    players_df = get_df(bucket_name, key)
-
-    # Merge team names into players_df
-    players_df = players_df.merge(teams_df[['id', 'name']], left_on='team', right_on='id', suffixes=('', '_team'))
-    players_df['team_name'] = players_df['name']
-    players_df = players_df.drop('name', axis=1)
-
-    bet_df.reset_index(inplace=True)
-    bet_df['game_week'] = gameweek
+# Per-stage wall times (seconds) of the last get_data() run
+startup_timings = {}
 
-    history = get('https://fantasy.premierleague.com/api/element-summary/318/')
-    history_df = pd.DataFrame(history['history'])
+def timed(timings, stage, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    timings[stage] = time.perf_counter() - start
+    return result
 
-    all_history_df = load_player_data_from_s3('fpl-bucket-2025', 'player_data.json')
+def next_gameweek(events):
+    """
+    Returns the id of the first gameweek whose deadline is still ahead.
+    """
+    today = datetime.now().timestamp()
+    return next(event['id'] for event in events if event['deadline_time_epoch'] > today)
 
-    return bet_df, players_df, fixtures_df, gameweek, history_df,teams_df, all_history_df
+def get_data():
+    """
+    Loads everything the app needs at boot. The player history download starts straight away and runs
+    alongside bootstrap-static; the two gameweek CSVs are fetched in parallel once the gameweek is known.
+    """
+    timings = {}
+    start = time.perf_counter()
+    bucket_name = BUCKET_NAME
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        history_future = executor.submit(timed, timings, 'player history', load_player_snapshot, bucket_name)
+        lineups_future = executor.submit(timed, timings, LINEUPS_FILE, load_lineups, bucket_name, LINEUPS_FILE)
+
+        players = timed(timings, 'bootstrap-static', get, 'https://fantasy.premierleague.com/api/bootstrap-static/')
+        response_cache.set_events(players['events'])
+        teams_df = pd.DataFrame(players['teams'])
+        gameweek = next_gameweek(players['events'])
+        fixtures_df = pd.DataFrame(players['events'])
+        fixtures_df = fixtures_df.loc[fixtures_df.id>=gameweek]
+
+        bet_key = "odds-gameweek-" +str(gameweek) +".csv"
+        players_key = "players-gameweek-" +str(gameweek) +".csv"
+        bet_future = executor.submit(timed, timings, bet_key, get_df, bucket_name, bet_key)
+        players_future = executor.submit(timed, timings, players_key, get_df, bucket_name, players_key)
+        bet_df = bet_future.result()
+        players_df = players_future.result()
+
+        # Merge team names into players_df
+        players_df = players_df.merge(teams_df[['id', 'name']], left_on='team', right_on='id', suffixes=('', '_team'))
+        players_df['team_name'] = players_df['name']
+        players_df = players_df.drop('name', axis=1)
+
+        bet_df.reset_index(inplace=True)
+        bet_df['game_week'] = gameweek
+
+        snapshot_etag, history = history_future.result()
+        lineups = lineups_future.result()
+
+    # what the history snapshot is and which gameweeks it should cover, see DataContext.snapshot_is_current
+    snapshot = {
+        'etag': snapshot_etag,
+        'season': response_cache.season_of(players['events']),
+        'checked_round': max((event['id'] for event in players['events'] if event.get('data_checked')), default=0),
+    }
+
+    timings['total'] = time.perf_counter() - start
+    startup_timings.clear()
+    startup_timings.update(timings)
+    print("Startup timings: " + ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in timings.items()))
+
+    return bet_df, players_df, fixtures_df, gameweek, teams_df, history, lineups, snapshot
 
 
 def load_player_data_from_s3(bucket_name, file_name):
     """
-    Loads the player data from the specified S3 bucket and file name and returns it as a list of dictionaries.
+    Loads the player data from the specified S3 bucket and file name into a HistoryTable. Players are parsed
+    one at a time from the stream and their rows' values go straight into the table's typed column buffers.
     """
-    s3 = boto3.resource('s3')
-    obj = s3.Object(bucket_name, file_name)
-    response = obj.get()
+    with get_storage(bucket_name).open(file_name) as body:
+        columns = history_columns(stream_player_data(body))
 
-    player_data = json.loads(response['Body'].read().decode('utf-8'))
+    return HistoryTable(columns)
 
-    return player_data
+def load_player_history_columns(bucket_name, fields=HISTORY_FIELDS, gameweeks=None, prefix=HISTORY_PREFIX):
+    """
+    Loads the columnar player history written by the collector as {field: array}. Only the requested
+    gameweek partitions (all if gameweeks is None) are downloaded and only the requested fields are
+    decompressed.
+    """
+    storage = get_storage(bucket_name)
+    with storage.open(prefix + '/manifest.json') as body:
+        manifest = json.loads(body.read())
+
+    partitions = []
+    for partition in manifest['gameweeks']:
+        if gameweeks is not None and partition['gameweek'] not in gameweeks:
+            continue
+        with storage.open(partition['key']) as body:
+            data = io.BytesIO(body.read())
+        with np.load(data, allow_pickle=False) as table:
+            partitions.append(stored_columns(table, fields))
+
+    return concat_columns(partitions, fields)
+
+def load_player_snapshot(bucket_name):
+    """
+    Returns (ETag, HistoryTable) for the player history snapshot. The columnar history is loaded when the
+    bucket has one, otherwise player_data.json. The ETag is read first, so a snapshot replaced while this
+    one loads shows up as changed on the next refresh.
+    """
+    storage = get_storage(bucket_name)
+    etag = storage.etag(HISTORY_MANIFEST)
+    if etag is not None:
+        return etag, HistoryTable(load_player_history_columns(bucket_name))
+    print(f"No {HISTORY_MANIFEST} found, loading {PLAYER_DATA_FILE}")
+    return storage.etag(PLAYER_DATA_FILE), load_player_data_from_s3(bucket_name, PLAYER_DATA_FILE)
+
+def snapshot_etag(bucket_name=BUCKET_NAME):
+    """ETag of the snapshot load_player_snapshot would load"""
+    storage = get_storage(bucket_name)
+    etag = storage.etag(HISTORY_MANIFEST)
+    return etag if etag is not None else storage.etag(PLAYER_DATA_FILE)
+
+def load_lineups(bucket_name, file_name):
+    """
+    Returns the precomputed fixture lineups ({fixture id: lineup}) written by data_collectors.build_lineups,
+    or an empty dict if they haven't been built, in which case lineups are built on demand.
+    """
+    try:
+        with get_storage(bucket_name).open(file_name) as body:
+            return json.loads(body.read())
+    except Exception as e:
+        print(f"No precomputed lineups loaded ({e}), building them on demand")
+        return {}
+
+def stream_player_data(body, fields=None, chunk_size=1 << 16):
+    """
+    Incrementally parses a player_data.json stream, yielding one {'id', 'history'} dict at a time.
+    Only `chunk_size` bytes of the body and one player's JSON text are held at once, and history rows
+    are cut down to `fields` as they are parsed.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        # skip separators between array items
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if not started and pos < len(buffer):
+            if buffer[pos] != '[':
+                raise ValueError("player data must be a JSON array")
+            started = True
+            pos += 1
+            continue
+        if started and pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            if pos >= len(buffer) or not started:
+                raise ValueError("need more data")
+            player, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            if eof:
+                raise ValueError("unexpected end of player data")
+            chunk = body.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+            pos = 0
+            continue
+        pos = end
+        if fields is not None:
+            player['history'] = [{field: row[field] for field in fields if field in row} for row in player['history']]
+        yield player
 
 def get_df(bucket, key):
-    s3 = boto3.client('s3')
-    obj = s3.get_object(Bucket=bucket, Key=key)
-    df = pd.read_csv(io.BytesIO(obj['Body'].read()))
+    with get_storage(bucket).open(key) as body:
+        df = pd.read_csv(io.BytesIO(body.read()))
     return df
 
 def get(url):
-    response = requests.get(url, verify=False)
-    return json.loads(response.content)
+    # concurrent callbacks asking for the same url share one cache lookup / upstream request
+    return flights.do(url, lambda: response_cache.cached_json(url, get_json))
+
+def fetch_stats():
+    """
+    Returns response-cache hit/miss, single-flight coalescing and live-points counters for this process.
+    """
+    return {'response_cache': response_cache.stats(), 'single_flight': flights.stats(),
+            'live_points': live_points.stats()}
 
 def add_names(selected_players, names_to_add, map, team_map):
     for name in names_to_add:
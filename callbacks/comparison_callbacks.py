@@ -4,7 +4,11 @@ import pandas as pd
 import plotly.express as px
 from build import get, add_names, remove_names, add_seq_names
 
-def register_comparison_callbacks(app, players_df, cache):
+def session_key(session_id, name):
+    """Cache key for one browser session's comparison state"""
+    return f"compare:{session_id}:{name}"
+
+def register_comparison_callbacks(app, data, cache):
     """Register all player comparison callbacks"""
     
     @app.callback(
@@ -13,30 +17,30 @@ def register_comparison_callbacks(app, players_df, cache):
         [dash.dependencies.Input("multi-player-drop-down", "value")],
         [dash.dependencies.Input("stat-drop-down", "value")],
         [dash.dependencies.Input("stat-drop-down-2", "value")],
+        [dash.dependencies.State("session", "data")],
     )
-    def sequential_graphs(player_names, stat, lower_stat):
+    def sequential_graphs(player_names, stat, lower_stat, session_id):
         if isinstance(player_names, str):
             player_names = [player_names]
-        selected_players = pd.DataFrame()
-        if ctx.triggered[0]['prop_id']=='.' :
-            # store the selected players in the cache object
-            cache.set('selected_seq_players', player_names)
+        state_key = session_key(session_id, 'sequential_state')
+        cached = cache.get(state_key) if ctx.triggered_id is not None else None
+        if cached is None:
+            # first render, or state expired / written by another session: start from scratch
             names_to_add = player_names
             selected_players = pd.DataFrame()
+        else:
+            selected_players = pd.DataFrame(cached['records'])
+            names_to_add = list(set(player_names) - set(cached['names'])) 
             
-        elif ctx.triggered[0]['prop_id'] == "multi-player-drop-down.value" or ctx.triggered[0]['prop_id']=='stat-drop-down.value'or ctx.triggered[0]['prop_id']=='stat-drop-down-2.value':
-            cached_names = cache.get('selected_seq_players')
-            selected_players = pd.DataFrame(cache.get('selected_seq_playersdf'))
-            names_to_add = list(set(player_names) - set(cached_names)) 
-            
-        map=dict(zip(players_df.web_name, players_df.id))
-        team_map=dict(zip(players_df.team, players_df.team_name))
+        context = data.current
+        map=context.player_ids_by_name
+        team_map=context.team_names
 
         selected_players = add_seq_names(selected_players, names_to_add, map, team_map)
         selected_players = remove_names(selected_players, player_names)
 
-        cache.set('selected_seq_players', player_names)
-        cache.set('selected_seq_playersdf', selected_players.to_dict('records'))
+        # names and rows are stored together so they can't be evicted separately
+        cache.set(state_key, {'names': player_names, 'records': selected_players.to_dict('records')})
         fig = px.line(selected_players, x="round", y=stat, color='name')
         fig2 = px.line(selected_players, x="round", y=lower_stat, color='name')
         return fig, fig2
@@ -46,30 +50,28 @@ def register_comparison_callbacks(app, players_df, cache):
         [dash.dependencies.Output("player-price-2", "figure")],
         [dash.dependencies.Input("multi-player-drop-down-2", "value")],
         [dash.dependencies.Input("cum-stat-drop-down", "value")],
-        [dash.dependencies.Input("cum-stat-drop-down-2", "value")]
+        [dash.dependencies.Input("cum-stat-drop-down-2", "value")],
+        [dash.dependencies.State("session", "data")]
     )
-    def cumulative_graphs(player_names, stat, lower_stat):
+    def cumulative_graphs(player_names, stat, lower_stat, session_id):
 
         if isinstance(player_names, str):
             player_names = [player_names]
-        selected_players = pd.DataFrame()
-        if ctx.triggered[0]['prop_id']=='.' :
-            # store the selected players in the cache object
-            cache.set('selected_players', player_names)
+        state_key = session_key(session_id, 'cumulative_state')
+        cached = cache.get(state_key) if ctx.triggered_id is not None else None
+        if cached is None:
             names_to_add = player_names
             selected_players = pd.DataFrame()
-        elif ctx.triggered[0]['prop_id'] == "multi-player-drop-down-2.value" or ctx.triggered[0]['prop_id']=='cum-stat-drop-down.value' or ctx.triggered[0]['prop_id']=='cum-stat-drop-down-2.value':
-            cached_names = cache.get('selected_players')
-            selected_players = pd.DataFrame(cache.get('selected_playersdf'))
-            names_to_add = list(set(player_names) - set(cached_names)) 
+        else:
+            selected_players = pd.DataFrame(cached['records'])
+            names_to_add = list(set(player_names) - set(cached['names'])) 
 
-        map=dict(zip(players_df.web_name, players_df.id))
-        
-        team_map=dict(zip(players_df.team, players_df.team_name))
+        context = data.current
+        map=context.player_ids_by_name
+        team_map=context.team_names
         selected_players = add_names(selected_players, names_to_add,map, team_map)
         selected_players = remove_names(selected_players, player_names)
-        cache.set('selected_players', player_names)
-        cache.set('selected_playersdf', selected_players.to_dict('records'))
+        cache.set(state_key, {'names': player_names, 'records': selected_players.to_dict('records')})
         
 
         fig = px.line(selected_players, x="round", y=stat, color='name')
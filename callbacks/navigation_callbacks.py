@@ -10,7 +10,7 @@ from components.team_change_recommender import change_recommender
 from components.gameweek_review import gameweek_review
 from components.ai_advisor import create_ai_advisor_layout
 
-def register_navigation_callbacks(app, players_df, teams_df, bet_df, gameweek):
+def register_navigation_callbacks(app, data):
     """Register navigation and page routing callbacks"""
     
     @app.callback(
@@ -18,25 +18,28 @@ def register_navigation_callbacks(app, players_df, teams_df, bet_df, gameweek):
         [dash.dependencies.Input("url", "pathname")]
     )
     def render_page_content(pathname):
+        context = data.current
+        players_df = context.players_df
+        teams_df = context.teams_df
         if pathname == "/":
             return [
                     html.H1('ERROR PAGE',
                             style={'textAlign':'center'}),                
                     ]
         elif pathname == "/player":
-            return player_history(players_df, teams_df)
+            return player_history(players_df, teams_df, context.player_history)
 
         elif pathname == "/player_compare":
             return player_compare(players_df, teams_df)
         
         elif pathname == "/upcoming_gameweek":
-            return upcoming(bet_df, players_df, teams_df)
+            return upcoming(context.bet_df, players_df, teams_df)
         
         elif pathname == "/transfer_recommender":
             return change_recommender()
 
         elif pathname == "/gameweek_review":
-            return gameweek_review(players_df, teams_df, gameweek-1)
+            return gameweek_review(players_df, teams_df, context.gameweek-1)
         
         elif pathname == "/ai_advisor":
             return create_ai_advisor_layout()
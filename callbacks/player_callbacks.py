@@ -1,11 +1,21 @@
 import dash
 from dash import ctx
+import os
 import pandas as pd
 import plotly.express as px
-from build import get, add_names, remove_names, add_seq_names
+import plotly.utils
+from build import add_names, remove_names, add_seq_names
+from response_cache import DiskCache
+from storage import CACHE_DIR
 import json
 
-def register_player_callbacks(app, players_df, all_history_df, cache):
+FIGURE_CACHE_PATH = os.environ.get('FPL_FIGURE_CACHE', os.path.join(CACHE_DIR, 'figures.sqlite'))
+FIGURE_CACHE_MAX_MB = int(os.environ.get('FPL_FIGURE_CACHE_MAX_MB', 64))
+
+# Rendered /player figures keyed by data version and player id, shared by every worker on the host
+figure_cache = DiskCache(FIGURE_CACHE_PATH, FIGURE_CACHE_MAX_MB * 1024 * 1024)
+
+def register_player_callbacks(app, data, cache):
     """Register all player-related callbacks"""
     
     @app.callback(
@@ -20,14 +30,20 @@ def register_player_callbacks(app, players_df, all_history_df, cache):
             empty_fig = px.scatter(title="Select a player to view data")
             return empty_fig, empty_fig, empty_fig
         
+        context = data.current
         try:
-            # Get player data more efficiently - use 'id' column instead of index
-            player_map = dict(zip(players_df.web_name, players_df.id_x))
-            team_map = dict(zip(players_df.team, players_df.team_name))
+            player_map = context.player_ids_by_name
+            team_map = context.team_names
             
             pid = player_map[player_name]
-            history = get("https://fantasy.premierleague.com/api/element-summary/"+str(pid)+"/")
-            history = pd.DataFrame(history['history'])
+            # figures only depend on the snapshot, so they can be reused until the data version changes
+            cacheable = context.history.has_player(pid) and context.snapshot_is_current
+            cache_key = f"player-figures:{context.version}:{pid}"
+            cached = figure_cache.get(cache_key) if cacheable else None
+            if cached is not None:
+                return tuple(json.loads(cached))
+
+            history = pd.DataFrame(context.player_history(pid))
             history.opponent_team = history.opponent_team.map(team_map)
 
             history.loc[history['total_points'] < 3, "color" ] = 0
@@ -59,6 +75,9 @@ def register_player_callbacks(app, players_df, all_history_df, cache):
 
             player_score['cumulative_score'] = player_score.total_points.cumsum()
             fig3 = px.line(player_score, x="round", y="cumulative_score")
+            if cacheable:
+                figures = [fig.to_plotly_json(), fig2.to_plotly_json(), fig3.to_plotly_json()]
+                figure_cache.set(cache_key, json.dumps(figures, cls=plotly.utils.PlotlyJSONEncoder).encode('utf-8'))
             return fig,fig2, fig3
         except Exception as e:
             print(f"Error in update_scatter_chart: {str(e)}")
@@ -79,16 +98,16 @@ def register_player_callbacks(app, players_df, all_history_df, cache):
         if not player_name:
             return "", "", "", "", ""
             
-        selected_player = players_df.loc[players_df.web_name==player_name]
-        if selected_player.empty:
+        selected_player = data.current.player_rows_by_name.get(player_name)
+        if selected_player is None:
             return "", "", "", "", ""
             
-        code = selected_player.photo.iat[0].split('.')[0]  # Remove file extension if present
+        code = selected_player['photo'].split('.')[0]  # Remove file extension if present
         image_string = "https://resources.premierleague.com/premierleague/photos/players/110x140/p" + str(code) + ".png"
-        ownership = str(selected_player.selected_by_percent.iat[0]) + "%"
-        rank = str(selected_player.ict_index.iat[0])
+        ownership = str(selected_player['selected_by_percent']) + "%"
+        rank = str(selected_player['ict_index'])
 
-        return image_string, str(selected_player.now_cost.iat[0]/10), str(selected_player.total_points.iat[0]), ownership, rank
+        return image_string, str(selected_player['now_cost']/10), str(selected_player['total_points']), ownership, rank
 
     @app.callback(
         dash.dependencies.Output("history_table", "children"), 
@@ -98,11 +117,11 @@ def register_player_callbacks(app, players_df, all_history_df, cache):
         if not player_name:
             return ""
             
-        selected_player = players_df.loc[players_df.web_name==player_name]
-        if selected_player.empty:
+        selected_player = data.current.player_rows_by_name.get(player_name)
+        if selected_player is None:
             return ""
             
-        return selected_player.total_points.iat[0]
+        return selected_player['total_points']
 
     @app.callback(
         dash.dependencies.Output("player-drop-down", "options"),
@@ -118,6 +137,4 @@ def register_player_callbacks(app, players_df, all_history_df, cache):
         "Midfielder" : 3,
         "Forward" : 4}
         position = positions_map[position]
-        players_1 = players_df.loc[players_df.team_name==team]
-        players = players_1.loc[players_1.element_type==position]
-        return players.web_name.unique()
\ No newline at end of file
+        return data.current.player_names_by_team_position.get((team, position), [])
\ No newline at end of file
@@ -2,11 +2,33 @@ import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
 import pandas as pd
-import requests
+import numpy as np
 import plotly.graph_objs as go
-from build import get
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain, repeat
+from operator import itemgetter
+from build import get, timed
+import live_points
 
-def register_team_callbacks(app, players_df, gameweek):
+# Upper bound on concurrent API requests for one team load (the HTTP client also caps requests per host)
+TEAM_FETCH_WORKERS = int(os.environ.get('FPL_TEAM_FETCH_WORKERS', 8))
+
+def fetch_gameweek(fpl_id, gw, picks_data=None):
+    """
+    Returns a manager's picks and every player's points (an array indexed by element id) for one gameweek.
+    """
+    if picks_data is None:
+        picks_data = get(f'https://fantasy.premierleague.com/api/entry/{fpl_id}/event/{gw}/picks/')
+
+    return {
+        'gameweek': gw,
+        'picks': picks_data.get('picks', []),
+        'player_points': live_points.points(gw)
+    }
+
+def register_team_callbacks(app, data):
     """Register all team-related callbacks"""
     
     @app.callback(
@@ -17,13 +39,24 @@ def register_team_callbacks(app, players_df, gameweek):
          dash.dependencies.Output('squad-value-section', 'children'),
          dash.dependencies.Output('price-changes-section', 'children')],
         [dash.dependencies.Input('load-team-button', 'n_clicks')],
-        [dash.dependencies.State('fpl-id-input', 'value')]
+        [dash.dependencies.State('fpl-id-input', 'value')],
+        # the layout already renders empty sections, so page loads don't start a job
+        prevent_initial_call=True,
+        # runs as a background job so the web worker is free while the ~2 requests per gameweek are made
+        background=True,
+        progress=[dash.dependencies.Output('team-load-progress', 'value'),
+                  dash.dependencies.Output('team-load-progress', 'label')],
+        running=[(dash.dependencies.Output('load-team-button', 'disabled'), True, False),
+                 (dash.dependencies.Output('team-load-progress', 'style'), {'marginBottom': '20px'}, {'display': 'none'})]
     )
-    def load_team(n_clicks, fpl_id):
+    def load_team(set_progress, n_clicks, fpl_id):
         """Load and display the user's FPL team"""
         if n_clicks == 0 or not fpl_id:
             return html.Div(), html.Div(), html.Div(), html.Div(), html.Div(), html.Div()
         
+        context = data.current
+        player_lookup = context.player_rows_by_id
+        gameweek = context.gameweek
         positions_map = {
             1: "GK",
             2: "DEF",
@@ -35,33 +68,52 @@ def register_team_callbacks(app, players_df, gameweek):
             # Get the user's team data from the Fantasy Premier League API
             # Use the last completed gameweek (current gameweek - 1)
             last_gameweek = gameweek - 1
-            response = requests.get(
-                f'https://fantasy.premierleague.com/api/entry/{fpl_id}/event/{last_gameweek}/picks/',
-                verify=False
-            )
-            data = response.json()
-            
-            # Check if we got valid data
-            if 'picks' not in data:
-                raise ValueError("No team data found for this gameweek")
-            
-            # Get team entry info
-            entry_response = requests.get(
-                f'https://fantasy.premierleague.com/api/entry/{fpl_id}/',
-                verify=False
-            )
-            entry_data = entry_response.json()
-            
-            # Get player IDs and their data
-            picks = data['picks']
-            player_ids = [p['element'] for p in picks]
-            
-            # Filter players and remove duplicates (keep only unique player IDs)
-            player_data = players_df.loc[players_df['id_x'].isin(player_ids)].copy()
-            player_data = player_data.drop_duplicates(subset='id_x', keep='first')
+            set_progress((5, "Loading team"))
+            timings = {}
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=TEAM_FETCH_WORKERS) as executor:
+                base = f'https://fantasy.premierleague.com/api/entry/{fpl_id}/'
+                picks_future = executor.submit(timed, timings, 'picks', get, f'{base}event/{last_gameweek}/picks/')
+                entry_future = executor.submit(timed, timings, 'entry', get, base)
+                history_future = executor.submit(timed, timings, 'history', get, f'{base}history/')
+                transfers_future = executor.submit(timed, timings, 'transfers', get, f'{base}transfers/')
+
+                team_picks = picks_future.result()
+                # Check if we got valid data
+                if 'picks' not in team_picks:
+                    raise ValueError("No team data found for this gameweek")
+
+                # Fetch all gameweek picks and live data to calculate player contributions.
+                # A failed gameweek is left out of the contributions rather than failing the whole load.
+                history_data = history_future.result()
+                current_season = history_data.get('current', [])
+                gameweeks_start = time.perf_counter()
+                gameweek_futures = {
+                    executor.submit(fetch_gameweek, fpl_id, gw_data['event'],
+                                    team_picks if gw_data['event'] == last_gameweek else None): gw_data['event']
+                    for gw_data in current_season
+                }
+                gameweek_results = {}
+                failed_gameweeks = {}
+                for done, future in enumerate(as_completed(gameweek_futures), 1):
+                    gw = gameweek_futures[future]
+                    try:
+                        gameweek_results[gw] = future.result()
+                    except Exception as e:
+                        failed_gameweeks[gw] = str(e)
+                    set_progress((10 + 80 * done // len(gameweek_futures), f"Loaded {done}/{len(gameweek_futures)} gameweeks"))
+                timings['gameweeks'] = time.perf_counter() - gameweeks_start
+                all_gameweek_picks = [gameweek_results[gw] for gw in sorted(gameweek_results)]
+
+                entry_data = entry_future.result()
+                transfers_data = transfers_future.result()
+            timings['total'] = time.perf_counter() - start
+            print(f"Team {fpl_id} load timings: " + ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in timings.items()))
+            for gw, error in sorted(failed_gameweeks.items()):
+                print(f"Error loading GW{gw} for team {fpl_id}: {error}")
             
-            # Create a dictionary for quick lookup
-            player_lookup = player_data.set_index('id_x').to_dict('index')
+            # Get the picks; player details come from the shared id -> row lookup
+            picks = team_picks['picks']
             
             # Organize players by position
             starting_11 = []
@@ -97,64 +149,27 @@ def register_team_callbacks(app, players_df, gameweek):
             # Create substitutes section
             subs_section = create_substitutes_section(substitutes)
             
-            # Fetch gameweek history for position graph
-            history_response = requests.get(
-                f'https://fantasy.premierleague.com/api/entry/{fpl_id}/history/',
-                verify=False
-            )
-            history_data = history_response.json()
-            
-            # Fetch transfer history to calculate cumulative points
-            transfers_response = requests.get(
-                f'https://fantasy.premierleague.com/api/entry/{fpl_id}/transfers/',
-                verify=False
-            )
-            transfers_data = transfers_response.json()
-            
-            # Fetch all gameweek picks and live data to calculate player contributions
-            all_gameweek_picks = []
-            current_season = history_data.get('current', [])
-            for gw_data in current_season:
-                gw = gw_data['event']
-                try:
-                    # Get picks for this gameweek
-                    picks_response = requests.get(
-                        f'https://fantasy.premierleague.com/api/entry/{fpl_id}/event/{gw}/picks/',
-                        verify=False
-                    )
-                    picks_data = picks_response.json()
-                    
-                    # Get live points data for this gameweek
-                    live_response = requests.get(
-                        f'https://fantasy.premierleague.com/api/event/{gw}/live/',
-                        verify=False
-                    )
-                    live_data = live_response.json()
-                    
-                    # Create a lookup dict of player_id -> points
-                    player_points_lookup = {}
-                    for element in live_data.get('elements', []):
-                        player_points_lookup[element['id']] = element['stats']['total_points']
-                    
-                    all_gameweek_picks.append({
-                        'gameweek': gw,
-                        'picks': picks_data.get('picks', []),
-                        'player_points': player_points_lookup
-                    })
-                except:
-                    continue
-            
+            set_progress((95, "Building charts"))
             # Create position history graph with top contributors
-            position_graph = create_position_graph(history_data, transfers_data, players_df, all_gameweek_picks)
+            position_graph = create_position_graph(history_data, transfers_data, player_lookup, all_gameweek_picks)
             
             # Create squad value graph
             squad_value = create_squad_value_graph(history_data)
             
             # Create price changes list
-            price_changes = create_price_changes_list(transfers_data, players_df, starting_11, substitutes)
+            price_changes = create_price_changes_list(transfers_data, player_lookup, starting_11, substitutes)
             
             # Create team info banner
             team_info_banner = create_team_info_banner(entry_data, history_data, last_gameweek)
+            if failed_gameweeks:
+                team_info_banner = html.Div([
+                    team_info_banner,
+                    dbc.Alert(
+                        "Couldn't load GW " + ", ".join(str(gw) for gw in sorted(failed_gameweeks)) +
+                        "; those gameweeks are missing from the top contributors.",
+                        color="warning", style={'marginTop': '10px'}
+                    )
+                ])
             
             return team_info_banner, pitch_layout, subs_section, position_graph, squad_value, price_changes
             
@@ -240,7 +255,7 @@ def create_team_info_banner(entry_data, history_data, gameweek):
         return html.Div()
 
 
-def create_position_graph(history_data, transfers_data, players_df, all_gameweek_picks):
+def create_position_graph(history_data, transfers_data, player_lookup, all_gameweek_picks):
     """Create a line chart showing overall rank by gameweek and top contributors list"""
     try:
         current_season = history_data.get('current', [])
@@ -275,7 +290,7 @@ def create_position_graph(history_data, transfers_data, players_df, all_gameweek
         )
         
         # Calculate top contributors based on transfer history and gameweek picks
-        top_contributors = calculate_top_contributors(transfers_data, players_df, all_gameweek_picks)
+        top_contributors = calculate_top_contributors(transfers_data, player_lookup, all_gameweek_picks)
         
         # Create top contributors list
         contributors_list = html.Div([
@@ -303,7 +318,7 @@ def create_position_graph(history_data, transfers_data, players_df, all_gameweek
         return html.Div()
 
 
-def calculate_top_contributors(transfers_data, players_df, all_gameweek_picks):
+def calculate_top_contributors(transfers_data, player_lookup, all_gameweek_picks):
     """Calculate cumulative points for each player since they were added to the team"""
     try:
         # Build transfer timeline: track when players were transferred in/out
@@ -333,53 +348,60 @@ def calculate_top_contributors(transfers_data, players_df, all_gameweek_picks):
                 # Player was in original squad and transferred out
                 player_timeline[element_out] = {'in_gw': first_gw, 'out_gw': event}
         
-        # Calculate cumulative points for each player
-        player_points = {}  # player_id: cumulative_points
-        
-        for gw_data in all_gameweek_picks:
-            gw = gw_data['gameweek']
-            picks = gw_data['picks']
-            player_points_lookup = gw_data.get('player_points', {})
-            
-            for pick in picks:
-                player_id = pick['element']
-                # Get actual points from live data
-                points = player_points_lookup.get(player_id, 0)
-                multiplier = pick.get('multiplier', 1)
-                
-                # Check if player was in squad for this gameweek
-                if player_id in player_timeline:
-                    timeline = player_timeline[player_id]
-                    # Only count if gameweek is after transfer in and before transfer out (if any)
-                    if gw >= timeline['in_gw'] and (timeline['out_gw'] is None or gw < timeline['out_gw']):
-                        if player_id not in player_points:
-                            player_points[player_id] = 0
-                        player_points[player_id] += points * multiplier
-                else:
-                    # Player was in original squad and never transferred out
-                    if player_id not in player_points:
-                        player_points[player_id] = 0
-                    player_points[player_id] += points * multiplier
-        
-        # Build list of player contributions
+        if not all_gameweek_picks:
+            return []
+
+        # Every pick of every gameweek as flat arrays, converted in one pass over the whole season. Points
+        # are gathered in one indexing pass from the gameweeks' live-points arrays laid end to end (a ragged
+        # gameweek x element matrix), plus a trailing 0 for ids past the end of their gameweek's array
+        counts = [len(gw_data['picks']) for gw_data in all_gameweek_picks]
+        all_picks = list(chain.from_iterable(gw_data['picks'] for gw_data in all_gameweek_picks))
+        elements = np.fromiter(map(itemgetter('element'), all_picks), dtype=np.int64, count=len(all_picks))
+        multipliers = np.fromiter(map(dict.get, all_picks, repeat('multiplier'), repeat(1)), dtype=np.int64,
+                                  count=len(all_picks))
+        rows = np.repeat(np.arange(len(all_gameweek_picks)), counts)
+        gameweeks = np.array([gw_data['gameweek'] for gw_data in all_gameweek_picks])[rows]
+        points_matrix = np.concatenate([gw_data['player_points'] for gw_data in all_gameweek_picks]
+                                       + [np.zeros(1, dtype=live_points.POINTS_DTYPE)])
+        row_widths = np.array([len(gw_data['player_points']) for gw_data in all_gameweek_picks])
+        row_starts = np.cumsum(row_widths) - row_widths
+        scored = elements < row_widths[rows]
+        points = points_matrix[np.where(scored, row_starts[rows] + elements, len(points_matrix) - 1)]
+
+        # Only count a pick while the player was in the squad (after transfer in, before transfer out);
+        # players with no transfers were in the original squad throughout
+        picked = elements
+        weights = points * multipliers
+        if player_timeline:
+            timeline_ids = np.fromiter(player_timeline, dtype=np.int64, count=len(player_timeline))
+            in_gw = np.full(max(timeline_ids.max(), elements.max(initial=0)) + 1, np.iinfo(np.int64).min)
+            out_gw = np.full(len(in_gw), np.iinfo(np.int64).max)
+            in_gw[timeline_ids] = [timeline['in_gw'] for timeline in player_timeline.values()]
+            out_gw[timeline_ids] = [timeline['out_gw'] if timeline['out_gw'] is not None else out_gw[0]
+                                    for timeline in player_timeline.values()]
+            counted = (gameweeks >= in_gw[elements]) & (gameweeks < out_gw[elements])
+            picked, weights = elements[counted], weights[counted]
+
+        # Sum per element id in one pass; ties keep the order each player first counted
+        totals = np.bincount(picked, weights=weights)
+        first_seen = np.full(len(totals), len(picked))
+        np.minimum.at(first_seen, picked, np.arange(len(picked)))
+        player_ids = np.flatnonzero(first_seen < len(picked))
+        totals = totals[player_ids]
+        ranking = np.lexsort((first_seen[player_ids], -totals))
+
+        # Build list of player contributions, resolving names through the id index
         player_contributions = []
-        for player_id, total_points in player_points.items():
-            # Get player info
-            player_info = players_df[players_df['id_x'] == player_id]
-            if player_info.empty:
+        for player_id, total_points in zip(player_ids[ranking].tolist(), totals[ranking].astype(np.int64).tolist()):
+            player_info = player_lookup.get(player_id)
+            if player_info is None:
                 continue
-            
-            player_name = player_info.iloc[0]['web_name']
-            
             player_contributions.append({
-                'name': player_name,
+                'name': player_info['web_name'],
                 'total_points': total_points,
                 'player_id': player_id
             })
-        
-        # Sort by total points descending
-        player_contributions.sort(key=lambda x: x['total_points'], reverse=True)
-        
+
         return player_contributions
         
     except Exception as e:
@@ -434,7 +456,7 @@ def create_squad_value_graph(history_data):
         return html.Div()
 
 
-def create_price_changes_list(transfers_data, players_df, starting_11, substitutes):
+def create_price_changes_list(transfers_data, player_lookup, starting_11, substitutes):
     """Create a list showing price changes for each player since they were added"""
     try:
         # Build transfer timeline to know when each player was added
@@ -468,9 +490,9 @@ def create_price_changes_list(transfers_data, players_df, starting_11, substitut
             player_id = player['id']
             current_price = player['now_cost']  # Already in millions
             
-            # Get player info from players_df for initial price
-            player_info = players_df[players_df['id_x'] == player_id]
-            if player_info.empty:
+            # Get player info for initial price
+            player_info = player_lookup.get(player_id)
+            if player_info is None:
                 continue
             
             # Determine purchase price
@@ -480,7 +502,7 @@ def create_price_changes_list(transfers_data, players_df, starting_11, substitut
                 # Player was in original squad, use their initial price (now_cost - total price change)
                 # We can approximate with their current cost minus any known changes
                 # For now, we'll get it from the full player data if available
-                purchase_price = player_info.iloc[0].get('cost', current_price)
+                purchase_price = player_info.get('cost', current_price)
             
             price_change = current_price - purchase_price
             
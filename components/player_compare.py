@@ -2,6 +2,7 @@ from dash import dcc, html
 import dash_bootstrap_components as dbc
 from dash import dash_table
 import pandas as pd
+import uuid
 
 from build import get 
 
@@ -56,7 +57,8 @@ def player_compare(players_df, teams_df):
     positions = players_df.element_type.unique()
     positions = [positions_map[x] for x in positions]
     content = html.Div(children=[
-        dcc.Store(id='session', storage_type='session'),
+        # a stored session id wins over this fresh one, so it stays stable for the life of the tab
+        dcc.Store(id='session', storage_type='session', data=str(uuid.uuid4())),
     dcc.Tabs([
 
         dcc.Tab(label='Sequential', style=tab_style, selected_style=tab_selected_style,
@@ -3,7 +3,6 @@ import dash_bootstrap_components as dbc
 from dash import dash_table
 import pandas as pd
 
-from build import get 
 
 tabs_styles = {
     'height': '44px',
@@ -25,7 +24,7 @@ tab_selected_style = {
     'padding': '6px'
 }
 
-def player_history(players_df, teams_df):
+def player_history(players_df, teams_df, get_history):
     positions_map = {1 : "Goalkeeper",
     2 : "Defender",
     3 : "Midfielder",
@@ -44,8 +43,7 @@ def player_history(players_df, teams_df):
     code = selected_player.id.iat[0]
     image_string = "https://resources.premierleague.com/premierleague/photos/players/110x140/p" + str(code) + ".png"
     id = selected_player.id.iat[0]
-    history = get("https://fantasy.premierleague.com/api/element-summary/"+str(id)+"/")
-    history_df = pd.DataFrame(history['history'])
+    history_df = pd.DataFrame(get_history(id))
     history_df.opponent_team = history_df.opponent_team.map(teams_map)
     history_df['fixture'] = history_df['opponent_team'] + " v " + selected_player['team_name'].iat[0]
     image = html.A([
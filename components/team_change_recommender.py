@@ -30,6 +30,9 @@ def change_recommender():
                 ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'})
             ])
         ], style={'marginBottom': '20px'}),
+
+        # Progress of the background team load; only shown while the job is running
+        dbc.Progress(id='team-load-progress', value=0, striped=True, animated=True, style={'display': 'none'}),
         
         # Loading indicator
         dcc.Loading(
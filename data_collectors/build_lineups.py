@@ -0,0 +1,35 @@
+import argparse
+
+from data_collectors.get_player_history import (BASE_URL, DEFAULT_TIMEOUT, PLAYER_DATA_FILE, get_bootstrap,
+                                                get_fixtures, make_client, read_snapshot, write_snapshot)
+from lineups import LINEUPS_FILE, build_lineups
+
+# Run after the collector, from the repository root: python -m data_collectors.build_lineups [--output-dir DIR]
+# Reads the player_data.json snapshot the collector just wrote and precomputes the gameweek review lineups.
+
+
+def main(base_url=BASE_URL, timeout=DEFAULT_TIMEOUT, output_dir=None):
+    player_data = read_snapshot(PLAYER_DATA_FILE, output_dir)
+    if player_data is None:
+        raise RuntimeError(f"No {PLAYER_DATA_FILE} snapshot found; run the collector first")
+
+    client = make_client(timeout=timeout)
+    elements = get_bootstrap(client, base_url, timeout)['elements']
+    fixtures = get_fixtures(client, base_url, timeout)
+
+    history_by_element_fixture = {(row['element'], row['fixture']): row
+                                  for player in player_data for row in player['history']}
+    players_by_id = {element['id']: element for element in elements}
+    lineups = build_lineups(fixtures, history_by_element_fixture, players_by_id)
+
+    write_snapshot(LINEUPS_FILE, lineups, output_dir)
+    print(f"Wrote lineups for {len(lineups)} finished fixtures")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Precompute the gameweek review lineup of every finished fixture")
+    parser.add_argument('--base-url', default=BASE_URL, help="FPL API root, e.g. a local stand-in server")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Per-request timeout in seconds")
+    parser.add_argument('--output-dir', help="Read and write snapshots in a local directory instead of S3")
+    args = parser.parse_args()
+    main(args.base_url, args.timeout, args.output_dir)
@@ -1,31 +1,280 @@
+import argparse
+import io
 import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import boto3
+import numpy as np
 import requests
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+from http_client import HttpClient
+
+# Run from the repository root: python -m data_collectors.get_player_history [--incremental] ...
+# Point this at a local stand-in server (e.g. http://localhost:8000/api) to run the collector offline
+BASE_URL = os.environ.get('FPL_API_URL', 'https://fantasy.premierleague.com/api')
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 10
+MAX_ATTEMPTS = 5
+
+BUCKET_NAME = 'fpl-bucket-2025'
+PLAYER_DATA_FILE = 'player_data.json'
+ELEMENTS_FILE = 'elements.json'
+COLUMNAR_PREFIX = 'player_history'
+
+# bootstrap-static fields that move whenever a player's history gains a row with minutes or points in it
+TRACKED_FIELDS = ('total_points', 'minutes', 'event_points')
+
 
-def get_all_player_ids():
+def make_client(concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
     """
-    Returns a list of all player IDs from the FPL bootstrap static API.
+    Returns a shared HTTP client whose connection pool and per-host limit match the given concurrency.
+    Every body is read once, so no responses are kept for revalidation.
+    """
+    return HttpClient(pool_size=concurrency, max_per_host=concurrency, timeout=timeout, verify=True,
+                      validator_cache_size=0)
+
+
+def get_bootstrap(client, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT):
+    """
+    Returns the FPL bootstrap static payload.
     """
-    url = "https://fantasy.premierleague.com/api/bootstrap-static/"
-    response = requests.get(url)
+    url = f"{base_url}/bootstrap-static/"
+    return client.get_json(url, timeout)
 
-    response.raise_for_status()
 
-    data = response.json()
+def get_all_player_ids(client, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT):
+    """
+    Returns a list of all player IDs from the FPL bootstrap static API.
+    """
+    data = get_bootstrap(client, base_url, timeout)
     player_ids = [player['id'] for player in data['elements']]
 
     return player_ids
 
-def get_player_history(player_id):
+
+def get_fixtures(client, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT):
+    """
+    Returns every fixture of the season from the FPL API.
+    """
+    url = f"{base_url}/fixtures/"
+    return client.get_json(url, timeout)
+
+
+@retry(
+    retry=retry_if_exception_type(requests.RequestException),
+    wait=wait_random_exponential(multiplier=0.5, max=10),
+    stop=stop_after_attempt(MAX_ATTEMPTS),
+    reraise=True,
+)
+def get_player_history(player_id, client, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT):
     """
     Returns the history data for a given player ID from the FPL API.
+    Failed requests are retried with jittered exponential backoff.
+    """
+    url = f"{base_url}/element-summary/{player_id}/"
+    return client.get_json(url, timeout)['history']
+
+
+def collect_player_data(player_ids, concurrency=DEFAULT_CONCURRENCY, client=None, base_url=BASE_URL,
+                        timeout=DEFAULT_TIMEOUT, progress_every=50):
+    """
+    Fetches the history of every player in player_ids using up to `concurrency` parallel requests.
+    Returns a list of {'id': ..., 'history': [...]} in the same order as player_ids.
+    """
+    client = client or make_client(concurrency, timeout)
+    histories = {}
+    failed = []
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(get_player_history, player_id, client, base_url, timeout): player_id
+            for player_id in player_ids
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            player_id = futures[future]
+            try:
+                histories[player_id] = future.result()
+            except Exception as e:
+                print(f"Failed to fetch history for player {player_id}: {e}")
+                failed.append(player_id)
+            if done % progress_every == 0 or done == len(futures):
+                elapsed = time.perf_counter() - start
+                print(f"Fetched {done}/{len(futures)} players in {elapsed:.1f}s")
+
+    elapsed = time.perf_counter() - start
+    rate = len(player_ids) / elapsed if elapsed else 0
+    print(f"Collected {len(histories)} players ({len(failed)} failed) in {elapsed:.1f}s "
+          f"[concurrency={concurrency}, {rate:.1f} req/s]")
+
+    if failed:
+        raise RuntimeError(f"Could not fetch history for {len(failed)} players: {sorted(failed)}")
+
+    return [{'id': player_id, 'history': histories[player_id]} for player_id in player_ids]
+
+
+def changed_player_ids(elements, previous_elements):
+    """
+    Returns the ids of players that are new or whose tracked bootstrap fields differ from the previous snapshot.
+    """
+    previous = {element['id']: element for element in previous_elements}
+    changed = []
+    for element in elements:
+        old = previous.get(element['id'])
+        if old is None or any(element.get(field) != old.get(field) for field in TRACKED_FIELDS):
+            changed.append(element['id'])
+    return changed
+
+
+def players_to_fetch(elements, previous_elements, previous_data):
+    """
+    Returns, in bootstrap order, the ids an incremental run refetches: players whose tracked fields changed,
+    players missing from the previous snapshot, and players whose previous history was empty (e.g. a pre-GW1
+    snapshot or a new signing), since blank rows can only be added after an existing history row.
+    """
+    previous = {player['id']: player['history'] for player in previous_data}
+    changed = set(changed_player_ids(elements, previous_elements))
+    return [element['id'] for element in elements
+            if element['id'] in changed or not previous.get(element['id'])]
+
+
+def _zero_like(value):
+    """
+    Returns a zero of the same kind as a history stat, keeping the API's string formatting (e.g. "0.00").
+    """
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return 0
+    if isinstance(value, str):
+        try:
+            float(value)
+        except ValueError:
+            return value
+        decimals = len(value.split('.')[1]) if '.' in value else 0
+        return f"{0:.{decimals}f}"
+    return value
+
+
+def blank_history_rows(element, history, fixtures, total_players):
+    """
+    Builds the zero-minute history rows FPL adds for a player who did not feature in newly finished fixtures.
+    Only called for players whose tracked fields are unchanged, so every stat is zero; price and ownership
+    come from the current bootstrap element. A fixture is new when it kicked off after the player's last
+    history row, which keeps the second game of a double gameweek that finished after the last run and
+    leaves out fixtures from before a mid-season signing.
+    """
+    if not history:
+        return []
+    template = history[-1]
+    last_kickoff = max(row['kickoff_time'] for row in history)
+    seen = {row['fixture'] for row in history}
+    selected = round(float(element.get('selected_by_percent', 0)) / 100 * total_players)
+
+    rows = []
+    for fixture in fixtures:
+        if not fixture.get('finished') or fixture['id'] in seen or not fixture.get('event'):
+            continue
+        if fixture['kickoff_time'] <= last_kickoff or element['team'] not in (fixture['team_h'], fixture['team_a']):
+            continue
+        was_home = fixture['team_h'] == element['team']
+        row = {key: _zero_like(value) for key, value in template.items()}
+        row.update({
+            'element': element['id'],
+            'fixture': fixture['id'],
+            'round': fixture['event'],
+            'opponent_team': fixture['team_a'] if was_home else fixture['team_h'],
+            'was_home': was_home,
+            'kickoff_time': fixture['kickoff_time'],
+            'team_h_score': fixture['team_h_score'],
+            'team_a_score': fixture['team_a_score'],
+            'modified': False,
+            'value': element['now_cost'],
+            'selected': selected,
+            'transfers_in': element.get('transfers_in_event', 0),
+            'transfers_out': element.get('transfers_out_event', 0),
+            'transfers_balance': element.get('transfers_in_event', 0) - element.get('transfers_out_event', 0),
+        })
+        rows.append(row)
+    return sorted(rows, key=lambda row: row['kickoff_time'])
+
+
+def update_player_data(previous_data, elements, fixtures, fetched, total_players):
+    """
+    Merges freshly fetched histories into the previous snapshot, padding everyone else with blank rows.
+    Returns the player list in bootstrap order.
+    """
+    previous = {player['id']: player['history'] for player in previous_data}
+    player_data = []
+    for element in elements:
+        player_id = element['id']
+        if player_id in fetched:
+            history = fetched[player_id]
+        else:
+            history = previous[player_id]
+            history = history + blank_history_rows(element, history, fixtures, total_players)
+        player_data.append({'id': player_id, 'history': history})
+    return player_data
+
+
+def snapshot_elements(elements):
+    """
+    Returns the subset of bootstrap elements kept between runs for change detection.
+    """
+    return [{'id': e['id'], 'team': e['team'], **{field: e.get(field) for field in TRACKED_FIELDS}}
+            for e in elements]
+
+
+def _to_column(values):
+    """
+    Converts one history field into a typed numpy array. Numeric strings such as expected_goals ("0.35")
+    become floats; anything else non-numeric is kept as a fixed-width unicode array.
     """
-    url = f"https://fantasy.premierleague.com/api/element-summary/{player_id}/"
-    response = requests.get(url)
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, bool) for v in present) and len(present) == len(values):
+        return np.array(values, dtype=bool)
+    if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present) and len(present) == len(values):
+        return np.array(values, dtype=np.int32)
+    try:
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array(['' if v is None else str(v) for v in values])
 
-    response.raise_for_status()
 
-    return response.json()['history']
+def to_columnar_partitions(player_data):
+    """
+    Flattens the player list into one {column: array} table per gameweek (history 'round').
+    """
+    rows_by_round = defaultdict(list)
+    for player in player_data:
+        for row in player['history']:
+            rows_by_round[row['round']].append(row)
+
+    partitions = {}
+    for gameweek, rows in sorted(rows_by_round.items()):
+        columns = sorted({key for row in rows for key in row})
+        partitions[gameweek] = {column: _to_column([row.get(column) for row in rows]) for column in columns}
+    return partitions
+
+
+def write_columnar_snapshot(player_data, output_dir=None):
+    """
+    Writes the history as compressed .npz files, one per gameweek, plus a manifest listing the partitions
+    and columns so readers can skip gameweeks and columns they do not need.
+    """
+    partitions = to_columnar_partitions(player_data)
+    manifest = {'gameweeks': [], 'columns': sorted({c for table in partitions.values() for c in table})}
+    for gameweek, table in partitions.items():
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **table)
+        key = f"{COLUMNAR_PREFIX}/round-{gameweek}.npz"
+        write_bytes(key, buffer.getvalue(), output_dir)
+        manifest['gameweeks'].append({'gameweek': gameweek, 'key': key, 'rows': len(table['element'])})
+    write_snapshot(f"{COLUMNAR_PREFIX}/manifest.json", manifest, output_dir)
 
 
 def upload_to_s3(bucket_name, file_name, data):
@@ -36,21 +285,96 @@ def upload_to_s3(bucket_name, file_name, data):
     obj = s3.Object(bucket_name, file_name)
     obj.put(Body=json.dumps(data))
 
-def main():
-    # Get player IDs
-    player_ids = get_all_player_ids()
 
-    # Get player data
-    player_data = []
-    for player_id in player_ids:
-        history = get_player_history(player_id)
-        player_data.append({'id': player_id, 'history': history})
+def download_from_s3(bucket_name, file_name):
+    """
+    Returns the JSON stored at the given S3 bucket and file name, or None if it does not exist.
+    """
+    s3 = boto3.resource('s3')
+    obj = s3.Object(bucket_name, file_name)
+    try:
+        response = obj.get()
+    except s3.meta.client.exceptions.NoSuchKey:
+        return None
+    return json.loads(response['Body'].read())
+
+
+def read_snapshot(file_name, output_dir=None):
+    """
+    Reads a previous snapshot from output_dir if given, otherwise from S3. Returns None if there is none.
+    """
+    if output_dir:
+        path = os.path.join(output_dir, file_name)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+    return download_from_s3(BUCKET_NAME, file_name)
+
+
+def write_snapshot(file_name, data, output_dir=None):
+    """
+    Writes a snapshot to output_dir if given, otherwise uploads it to S3.
+    """
+    if output_dir:
+        path = os.path.join(output_dir, file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        return
+    upload_to_s3(BUCKET_NAME, file_name, data)
+
+
+def write_bytes(file_name, body, output_dir=None):
+    """
+    Writes raw bytes to output_dir if given, otherwise uploads them to S3.
+    """
+    if output_dir:
+        path = os.path.join(output_dir, file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(body)
+        return
+    boto3.resource('s3').Object(BUCKET_NAME, file_name).put(Body=body)
+
+
+def main(concurrency=DEFAULT_CONCURRENCY, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT, output_dir=None,
+         incremental=False):
+    client = make_client(concurrency, timeout)
+    bootstrap = get_bootstrap(client, base_url, timeout)
+    elements = bootstrap['elements']
+    player_ids = [element['id'] for element in elements]
+
+    previous_data = read_snapshot(PLAYER_DATA_FILE, output_dir) if incremental else None
+    previous_elements = read_snapshot(ELEMENTS_FILE, output_dir) if incremental else None
+
+    if previous_data is None or previous_elements is None:
+        if incremental:
+            print("No previous snapshot found, running a full collection")
+        player_data = collect_player_data(player_ids, concurrency, client, base_url, timeout)
+    else:
+        to_fetch = players_to_fetch(elements, previous_elements, previous_data)
+        print(f"Incremental update: refetching {len(to_fetch)}/{len(player_ids)} players")
+        fetched = collect_player_data(to_fetch, concurrency, client, base_url, timeout) if to_fetch else []
+        fixtures = get_fixtures(client, base_url, timeout)
+        player_data = update_player_data(previous_data, elements, fixtures,
+                                         {player['id']: player['history'] for player in fetched},
+                                         bootstrap.get('total_players', 0))
+
+    # Write player data to JSON file, plus the element snapshot the next incremental run diffs against
+    write_snapshot(PLAYER_DATA_FILE, player_data, output_dir)
+    write_snapshot(ELEMENTS_FILE, snapshot_elements(elements), output_dir)
+    write_columnar_snapshot(player_data, output_dir)
 
-    # Write player data to CSV
-    # Write player data to JSON file
-    bucket_name = 'fpl-bucket-2025'
-    file_name = 'player_data.json'
-    upload_to_s3(bucket_name, file_name, player_data)
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Collect every player's FPL history into player_data.json")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="Number of element-summary requests in flight at once")
+    parser.add_argument('--base-url', default=BASE_URL, help="FPL API root, e.g. a local stand-in server")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Per-request timeout in seconds")
+    parser.add_argument('--output-dir', help="Read and write snapshots in a local directory instead of S3")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only refetch players whose bootstrap totals changed since the previous snapshot")
+    args = parser.parse_args()
+    main(args.concurrency, args.base_url, args.timeout, args.output_dir, args.incremental)
@@ -0,0 +1,164 @@
+import threading
+import time
+
+from build import get, get_data, next_gameweek, snapshot_etag
+from fixtures import FixturesRepository
+from lineups import fixture_lineup
+
+REFRESH_INTERVAL = 60
+
+
+class DataContext:
+    """
+    One immutable snapshot of the data the callbacks read. A new context is built for every reload,
+    so callbacks never see a half-updated mix of gameweeks.
+    """
+
+    def __init__(self, bet_df, players_df, fixtures_df, gameweek, teams_df, history, lineups=None,
+                 snapshot=None):
+        snapshot = snapshot or {}
+        self.bet_df = bet_df
+        self.players_df = players_df
+        self.fixtures_df = fixtures_df
+        self.gameweek = gameweek
+        self.teams_df = teams_df
+        # every player's history as a HistoryTable: rows by (element, fixture), frames by player
+        self.history = history
+        self.snapshot_round = history.last_round
+        self.snapshot_etag = snapshot.get('etag')
+        # the last gameweek FPL has finalised (data_checked) when this context was loaded
+        self.checked_round = snapshot.get('checked_round', 0)
+        # identifies the data set across workers and restarts (player and gameweek ids repeat every season,
+        # and the collector can replace the snapshot mid-gameweek); keys the shared figure cache
+        etag = str(self.snapshot_etag).strip('"')
+        self.version = f"{snapshot.get('season', '')}-gw{gameweek}-{etag}"
+
+        # Lookups the callbacks used to rebuild from players_df on every call
+        unique_names = players_df.drop_duplicates(subset='web_name', keep='first')
+        unique_ids = players_df.drop_duplicates(subset='id_x', keep='first')
+        self.player_ids_by_name = dict(zip(unique_names.web_name, unique_names.id_x))
+        self.player_rows_by_name = unique_names.set_index('web_name', drop=False).to_dict('index')
+        self.player_rows_by_id = unique_ids.set_index('id_x', drop=False).to_dict('index')
+        self.team_names = dict(zip(teams_df.id, teams_df.name))
+        self.player_names_by_team_position = {
+            key: list(group.web_name.unique())
+            for key, group in players_df.groupby(['team_name', 'element_type'])
+        }
+        self.fixtures = FixturesRepository(self.team_names)
+        self.lineups = dict(lineups or {})
+
+
+    @property
+    def snapshot_is_current(self):
+        """
+        True when the history snapshot covers every gameweek FPL had finalised at load time. Games of the
+        gameweek in progress reach the snapshot when the collector next runs, and the refresher reloads
+        as soon as the new snapshot lands.
+        """
+        return self.snapshot_round >= self.checked_round
+
+    def fixture_lineup(self, gameweek, fixture_id):
+        """
+        Returns the lineup record of a finished fixture. Fixtures finished since the lineups were last
+        precomputed are built from the history snapshot, and kept once the snapshot has rows for them
+        (a snapshot taken partway through a round may not yet).
+        """
+        lineup = self.lineups.get(str(fixture_id))
+        if lineup is None:
+            fixture = self.fixtures.fixture(gameweek, fixture_id)
+            lineup = fixture_lineup(fixture, self.history, self.player_rows_by_id)
+            if self.history.has_fixture(fixture_id):
+                self.lineups[str(fixture_id)] = lineup
+        return lineup
+
+    def player_history(self, player_id):
+        """
+        Returns a player's history from the in-memory snapshot as a DataFrame. Only falls back to a live
+        element-summary fetch (a list of rows) for players the snapshot doesn't know, or when the snapshot
+        predates the last gameweek FPL had finalised.
+        """
+        frame = self.history.player_frame(player_id) if self.snapshot_is_current else None
+        if frame is None:
+            return get("https://fantasy.premierleague.com/api/element-summary/" + str(player_id) + "/")['history']
+        return frame
+
+
+class DataStore:
+    """
+    Holds the current DataContext. Reloads build the next context off to the side and then swap
+    the reference, which is atomic, so requests in flight keep the context they started with.
+    """
+
+    def __init__(self, loader=get_data):
+        self.loader = loader
+        self._context = None
+        self._reload_lock = threading.Lock()
+        self.loaded_at = None
+        self.reload_seconds = None
+        self.reloads = 0
+        self.last_error = None
+
+    @property
+    def current(self):
+        return self._context
+
+    def reload(self):
+        """
+        Loads a fresh data set and makes it current. Returns the new context.
+        """
+        with self._reload_lock:
+            start = time.perf_counter()
+            context = DataContext(*self.loader())
+            self._context = context
+            self.reload_seconds = time.perf_counter() - start
+            self.loaded_at = time.time()
+            self.reloads += 1
+            return context
+
+    def status(self):
+        context = self._context
+        return {
+            'version': context.version if context else None,
+            'gameweek': int(context.gameweek) if context else None,
+            'loaded_at': self.loaded_at,
+            'reload_seconds': self.reload_seconds,
+            'reloads': self.reloads,
+            'last_error': self.last_error,
+        }
+
+
+class DataRefresher(threading.Thread):
+    """
+    Background thread that reloads the store once the deadline has rolled over to a new gameweek (polling
+    bootstrap-static) or the collector has written a new player history snapshot (polling the ETag of its
+    manifest, see build.snapshot_etag).
+    """
+
+    def __init__(self, store, interval=REFRESH_INTERVAL):
+        super().__init__(name='data-refresher', daemon=True)
+        self.store = store
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                gameweek = next_gameweek(get('https://fantasy.premierleague.com/api/bootstrap-static/')['events'])
+                etag = snapshot_etag()
+                current = self.store.current
+                reason = None
+                if current is None or gameweek != current.gameweek:
+                    reason = f"Gameweek rolled over to {gameweek}"
+                elif etag != current.snapshot_etag:
+                    reason = "New player history snapshot"
+                if reason:
+                    print(f"{reason}, reloading data")
+                    context = self.store.reload()
+                    print(f"Loaded data version {context.version} in {self.store.reload_seconds:.2f}s")
+                self.store.last_error = None
+            except Exception as e:
+                print(f"Error refreshing data: {e}")
+                self.store.last_error = str(e)
+
+    def stop(self):
+        self._stopped.set()
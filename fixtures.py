@@ -0,0 +1,57 @@
+import os
+import time
+
+import response_cache
+from build import get
+from http_client import SingleFlight
+
+FIXTURES_URL = 'https://fantasy.premierleague.com/api/fixtures/?event={}'
+# how long fixtures for a gameweek that isn't finished yet are reused before refetching
+IN_PROGRESS_TTL = int(os.environ.get('FPL_FIXTURES_TTL', 60))
+
+
+def fixture_title(fixture, team_names):
+    return f"{fixture['id']} - {team_names.get(fixture['team_h'])} v {team_names.get(fixture['team_a'])}"
+
+
+class FixturesRepository:
+    """
+    Fixtures per gameweek, fetched once and shared by the gameweek review callbacks, with the fixture
+    dropdown options worked out when the gameweek is loaded. Finished gameweeks are kept for the life
+    of the data version; the gameweek in progress is refetched after IN_PROGRESS_TTL seconds.
+    """
+
+    def __init__(self, team_names, fetch=get, ttl=IN_PROGRESS_TTL):
+        self.team_names = team_names
+        self.fetch = fetch
+        self.ttl = ttl
+        self._gameweeks = {}
+        self._flights = SingleFlight()
+
+    def gameweek(self, gameweek):
+        """
+        Returns {'fixtures', 'by_id', 'options'} for gameweek, where options are the dropdown entries
+        for its finished fixtures in id order.
+        """
+        gameweek = int(gameweek)
+        entry = self._gameweeks.get(gameweek)
+        if entry is not None and (entry['expires'] is None or entry['expires'] > time.time()):
+            return entry
+        return self._flights.do(gameweek, lambda: self._load(gameweek))
+
+    def fixture(self, gameweek, fixture_id):
+        return self.gameweek(gameweek)['by_id'][fixture_id]
+
+    def _load(self, gameweek):
+        fixtures = self.fetch(FIXTURES_URL.format(gameweek))
+        finished = sorted((fixture for fixture in fixtures if fixture.get('finished_provisional')),
+                          key=lambda fixture: fixture['id'])
+        titles = [fixture_title(fixture, self.team_names) for fixture in finished]
+        entry = {
+            'fixtures': fixtures,
+            'by_id': {fixture['id']: fixture for fixture in fixtures},
+            'options': [{'label': title, 'value': title} for title in titles],
+            'expires': None if gameweek in response_cache.finished_gameweeks else time.time() + self.ttl,
+        }
+        self._gameweeks[gameweek] = entry
+        return entry
@@ -0,0 +1,154 @@
+from array import array
+
+import numpy as np
+import pandas as pd
+
+# The player history fields the dashboard reads and how each is held in memory. FPL sends the ICT and
+# expected-stat fields as numeric strings ("0.35"); they are kept as floats.
+INT_FIELDS = ('element', 'fixture', 'round', 'opponent_team', 'total_points', 'minutes', 'goals_scored',
+              'assists', 'clean_sheets', 'goals_conceded', 'own_goals', 'penalties_saved', 'penalties_missed',
+              'yellow_cards', 'red_cards', 'saves', 'bonus', 'bps', 'starts', 'value', 'transfers_balance',
+              'selected', 'transfers_in', 'transfers_out')
+FLOAT_FIELDS = ('influence', 'creativity', 'threat', 'ict_index', 'expected_goals', 'expected_assists',
+                'expected_goal_involvements', 'expected_goals_conceded')
+HISTORY_DTYPES = {
+    **{field: np.dtype(np.int32) for field in INT_FIELDS},
+    **{field: np.dtype(np.float64) for field in FLOAT_FIELDS},
+    'was_home': np.dtype(bool),
+    'kickoff_time': np.dtype('U20'),  # ISO timestamps, e.g. 2025-08-16T14:00:00Z
+}
+HISTORY_FIELDS = tuple(HISTORY_DTYPES)
+
+# (element, fixture) pairs are looked up as one sorted int64 key; fixture ids stay well below this
+_KEY_STRIDE = 1 << 20
+
+
+def history_columns(players, fields=HISTORY_FIELDS):
+    """
+    Builds {field: array} from an iterable of {'id', 'history'} players, appending every row's values to
+    typed buffers as it goes, so no per-row dicts are kept.
+    """
+    buffers = {}
+    for field in fields:
+        dtype = HISTORY_DTYPES[field]
+        buffers[field] = [] if dtype.kind == 'U' else array('b' if dtype.kind == 'b' else dtype.char)
+    appenders = [(buffers[field].append, _converter(HISTORY_DTYPES[field]), field) for field in fields]
+
+    for player in players:
+        for row in player['history']:
+            for append, convert, field in appenders:
+                append(convert(row.get(field)))
+
+    columns = {}
+    for field, buffer in buffers.items():
+        dtype = HISTORY_DTYPES[field]
+        if dtype.kind == 'U':
+            columns[field] = np.array(buffer, dtype=dtype)
+        elif dtype.kind == 'b':
+            columns[field] = np.frombuffer(buffer, dtype=np.int8).astype(bool)
+        else:
+            columns[field] = np.frombuffer(buffer, dtype=dtype)
+    return columns
+
+
+def stored_columns(table, fields=HISTORY_FIELDS):
+    """
+    Reads `fields` from one stored partition ({field: array}, e.g. an opened .npz) and casts them to the
+    in-memory dtypes. Fields the partition lacks, or only has missing values for, get the same defaults
+    history_columns gives missing values.
+    """
+    rows = len(table['element'])
+    columns = {}
+    for field in fields:
+        dtype = HISTORY_DTYPES[field]
+        values = table.get(field)
+        if values is None or (dtype.kind == 'U' and values.dtype.kind != 'U'):
+            columns[field] = np.full(rows, _converter(dtype)(None), dtype=dtype)
+        elif dtype.kind != 'f' and values.dtype.kind == 'f':
+            # the collector stores an int column with missing values as floats
+            columns[field] = np.nan_to_num(values).astype(dtype)
+        else:
+            columns[field] = values.astype(dtype)
+    return columns
+
+
+def concat_columns(partitions, fields=HISTORY_FIELDS):
+    """Joins per-partition {field: array} tables into one"""
+    return {field: np.concatenate([partition[field] for partition in partitions]) if partitions
+            else np.empty(0, dtype=HISTORY_DTYPES[field]) for field in fields}
+
+
+def _converter(dtype):
+    if dtype.kind == 'i':
+        # JSON ints go straight into the buffer; missing values are stored as 0
+        return lambda value: value or 0
+    if dtype.kind == 'f':
+        return lambda value: np.nan if value is None else float(value)
+    if dtype.kind == 'b':
+        return lambda value: 1 if value else 0
+    return lambda value: '' if value is None else str(value)
+
+
+class HistoryTable:
+    """
+    Every player's history held column-wise, one array per field, with rows ordered by player and then
+    kickoff. Rows are only turned into dicts (or a player's rows into a DataFrame) when asked for.
+    """
+
+    def __init__(self, columns):
+        order = np.lexsort((columns['kickoff_time'], columns['element']))
+        self.columns = {field: column[order] for field, column in columns.items()}
+        elements = self.columns['element']
+        fixtures = self.columns['fixture']
+
+        player_ids, starts, counts = np.unique(elements, return_index=True, return_counts=True)
+        self._player_rows = {player_id: (start, start + count) for player_id, start, count
+                             in zip(player_ids.tolist(), starts.tolist(), counts.tolist())}
+        keys = elements.astype(np.int64) * _KEY_STRIDE + fixtures
+        self._key_order = np.argsort(keys, kind='stable')
+        self._sorted_keys = keys[self._key_order]
+        self.fixture_ids = frozenset(np.unique(fixtures).tolist())
+        self.last_round = int(self.columns['round'].max()) if len(elements) else 0
+
+    def __len__(self):
+        return len(self.columns['element'])
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values())
+
+    def has_player(self, player_id):
+        return player_id in self._player_rows
+
+    def has_fixture(self, fixture_id):
+        return fixture_id in self.fixture_ids
+
+    def row(self, index):
+        return {field: column[index].item() for field, column in self.columns.items()}
+
+    def get(self, key, default=None):
+        """
+        Returns the row of an (element, fixture) pair as a dict, or default if the snapshot has none.
+        """
+        element, fixture = key
+        target = element * _KEY_STRIDE + fixture
+        position = np.searchsorted(self._sorted_keys, target)
+        if position == len(self._sorted_keys) or self._sorted_keys[position] != target:
+            return default
+        return self.row(self._key_order[position])
+
+    def __getitem__(self, key):
+        row = self.get(key)
+        if row is None:
+            raise KeyError(key)
+        return row
+
+    def player_frame(self, player_id):
+        """
+        Returns a player's rows in kickoff order as a new DataFrame, or None if the snapshot doesn't have them.
+        """
+        rows = self._player_rows.get(player_id)
+        if rows is None:
+            return None
+        start, end = rows
+        return pd.DataFrame({field: column[start:end] for field, column in self.columns.items()})
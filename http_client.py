@@ -0,0 +1,180 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import brotli  # noqa: F401  (lets urllib3 decode br responses)
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+TIMEOUT = float(os.environ.get('FPL_HTTP_TIMEOUT', 10))
+POOL_SIZE = int(os.environ.get('FPL_HTTP_POOL_SIZE', 20))
+MAX_PER_HOST = int(os.environ.get('FPL_HTTP_MAX_PER_HOST', 8))
+VERIFY = os.environ.get('FPL_HTTP_VERIFY', '0') == '1'
+# number, and total body size, of responses whose ETag/Last-Modified (and body) are kept for revalidation
+VALIDATOR_CACHE_SIZE = int(os.environ.get('FPL_HTTP_VALIDATOR_CACHE_SIZE', 64))
+VALIDATOR_CACHE_MAX_MB = int(os.environ.get('FPL_HTTP_VALIDATOR_CACHE_MAX_MB', 16))
+
+# clients and single-flight groups to reset in a forked child (background job worker), which must not share
+# the parent's sockets, locks or in-flight calls. Held weakly so short-lived instances can still be freed.
+_fork_resets = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for instance in list(_fork_resets):
+        instance._reset()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class HttpClient:
+    """
+    Shared HTTP client: one pooled keep-alive session, default timeouts, a concurrency limit per host,
+    and ETag / If-Modified-Since revalidation so unchanged responses come back as a bodiless 304.
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, max_per_host=MAX_PER_HOST, timeout=TIMEOUT, verify=VERIFY,
+                 validator_cache_size=VALIDATOR_CACHE_SIZE, validator_cache_bytes=VALIDATOR_CACHE_MAX_MB * 1024 * 1024):
+        self.pool_size = pool_size
+        self.verify = verify
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self.validator_cache_size = validator_cache_size
+        self.validator_cache_bytes = validator_cache_bytes
+        self._validators = OrderedDict()  # url: (etag, last_modified, data, body size)
+        self._validator_bytes = 0
+        self._reset()
+        _fork_resets.add(self)
+
+    def _reset(self):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self.session.verify = self.verify
+        self._host_limits = {}
+        self._lock = threading.Lock()
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_limits[host]
+
+    def get(self, url, timeout=None, **kwargs):
+        """
+        Returns the raw response for url, waiting for a free slot on its host first.
+        """
+        with self._host_limit(url):
+            return self.session.get(url, timeout=timeout or self.timeout, **kwargs)
+
+    def get_json(self, url, timeout=None):
+        """
+        Returns the parsed JSON for url. If an earlier response carried an ETag or Last-Modified,
+        the request is made conditional and a 304 reuses the earlier body.
+        """
+        headers = {}
+        with self._lock:
+            cached = self._validators.get(url)
+        if cached:
+            etag, last_modified, _, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        response = self.get(url, timeout=timeout, headers=headers)
+        if response.status_code == 304 and cached:
+            with self._lock:
+                self._validators.move_to_end(url)
+            return cached[2]
+        response.raise_for_status()
+        data = response.json()
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        size = len(response.content)
+        if (etag or last_modified) and self.validator_cache_size and size <= self.validator_cache_bytes:
+            with self._lock:
+                previous = self._validators.pop(url, None)
+                if previous:
+                    self._validator_bytes -= previous[3]
+                self._validators[url] = (etag, last_modified, data, size)
+                self._validator_bytes += size
+                while (len(self._validators) > self.validator_cache_size
+                       or self._validator_bytes > self.validator_cache_bytes):
+                    self._validator_bytes -= self._validators.popitem(last=False)[1][3]
+        return data
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the function, later callers
+    arriving while it is in flight wait for it and share its result (or its exception).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._reset()
+        _fork_resets.add(self)
+
+    def _reset(self):
+        # calls in flight in the parent never finish in a forked child
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = self._Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._in_flight)
+        return {'calls': self.calls, 'coalesced': self.coalesced, 'in_flight': in_flight}
+
+
+client = HttpClient()
+flights = SingleFlight()
+
+
+def get_json(url, timeout=None):
+    return client.get_json(url, timeout)
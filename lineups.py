@@ -0,0 +1,62 @@
+LINEUPS_FILE = 'lineups.json'
+POSITIONS = ('1', '2', '3', '4')  # GK, DEF, MID, FWD element types; strings so records survive a JSON round trip
+
+
+def lineup_player(history_row, player):
+    """
+    Returns the compact record of one player in one fixture. photo is the player's photo code; the
+    image URL is built from it when rendering.
+    """
+    return {
+        'element': history_row['element'],
+        'web_name': player['web_name'],
+        'element_type': int(player['element_type']),
+        'photo': str(player['photo']).split('.')[0],
+        'points': history_row['total_points'],
+        'minutes': history_row['minutes'],
+    }
+
+
+def side_lineup(players):
+    """
+    Splits one side's players into starters grouped by position and subs. The 11 players with the most
+    minutes are the starters; a side with no forward on the pitch shows its last midfielder up front.
+    """
+    players = sorted(players, key=lambda player: player['minutes'], reverse=True)
+    starters, subs = players[:11], players[11:]
+    by_position = {position: [player for player in starters if str(player['element_type']) == position]
+                   for position in POSITIONS}
+    if not by_position['4'] and by_position['3']:
+        by_position['4'] = [by_position['3'].pop()]
+    return {'starters': by_position, 'subs': subs}
+
+
+def fixture_lineup(fixture, history_by_element_fixture, players_by_id):
+    """
+    Returns the lineup record of a finished fixture: {'fixture', 'event', 'home', 'away'}, each side
+    holding its starters by position and its subs. Players come from the fixture's bps list.
+    """
+    bps = fixture['stats'][-2]
+    record = {'fixture': fixture['id'], 'event': fixture['event']}
+    for side, key in (('home', 'h'), ('away', 'a')):
+        players = []
+        for entry in bps[key]:
+            history_row = history_by_element_fixture.get((entry['element'], fixture['id']))
+            player = players_by_id.get(entry['element'])
+            if history_row is None or player is None:
+                print(f"Unable to find player {entry['element']} for fixture {fixture['id']} in player history.")
+                continue
+            players.append(lineup_player(history_row, player))
+        record[side] = side_lineup(players)
+    return record
+
+
+def build_lineups(fixtures, history_by_element_fixture, players_by_id):
+    """
+    Returns {fixture id (as a string): lineup record} for every finished fixture.
+    """
+    return {
+        str(fixture['id']): fixture_lineup(fixture, history_by_element_fixture, players_by_id)
+        for fixture in fixtures
+        if fixture.get('finished_provisional') and fixture.get('stats')
+    }
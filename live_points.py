@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+import response_cache
+from http_client import SingleFlight, get_json
+
+LIVE_URL = 'https://fantasy.premierleague.com/api/event/{}/live/'
+# how long points for a gameweek that isn't finished yet are reused before refetching
+IN_PROGRESS_TTL = int(os.environ.get('FPL_LIVE_POINTS_TTL', 60))
+POINTS_DTYPE = np.int16
+
+
+def points_array(live_data):
+    """
+    Returns the total_points of every element in an event/{gw}/live/ payload as an array indexed by
+    element id. Ids missing from the payload score 0.
+    """
+    elements = live_data.get('elements', [])
+    ids = np.fromiter((element['id'] for element in elements), dtype=np.int32, count=len(elements))
+    points = np.fromiter((element['stats']['total_points'] for element in elements), dtype=POINTS_DTYPE,
+                         count=len(elements))
+    array = np.zeros(ids.max() + 1 if len(ids) else 0, dtype=POINTS_DTYPE)
+    array[ids] = points
+    return array
+
+
+class LivePointsStore:
+    """
+    Process-wide per-gameweek points, shared by every manager. Each gameweek is held as one small
+    int array indexed by element id instead of the ~1MB live payload. Arrays are also written to the
+    disk cache so other workers (and forked background jobs) don't refetch them; finished gameweeks
+    are kept forever, the gameweek in progress expires after IN_PROGRESS_TTL seconds.
+    """
+
+    def __init__(self, disk=None, fetch=get_json, ttl=IN_PROGRESS_TTL):
+        self.disk = disk if disk is not None else response_cache.responses
+        self.fetch = fetch
+        self.ttl = ttl
+        self.fetches = 0
+        self._arrays = {}  # (season, gameweek): (array, expires or None)
+        self._flights = SingleFlight()
+        self._lock = threading.Lock()
+
+    def points(self, gameweek):
+        """
+        Returns the points array for gameweek, loading it on first use.
+        """
+        # gameweek numbers repeat every season, so arrays are held per season
+        season_gameweek = (response_cache.season, gameweek)
+        entry = self._arrays.get(season_gameweek)
+        if entry is not None and (entry[1] is None or entry[1] > time.time()):
+            return entry[0]
+        return self._flights.do(season_gameweek, lambda: self._load(*season_gameweek))
+
+    def _load(self, season, gameweek):
+        finished = gameweek in response_cache.finished_gameweeks
+        key = f'live-points:{season}:{gameweek}'
+        body = self.disk.get(key)
+        if body is not None:
+            array = np.frombuffer(body, dtype=POINTS_DTYPE)
+        else:
+            array = points_array(self.fetch(LIVE_URL.format(gameweek)))
+            self.disk.set(key, array.tobytes(), response_cache.FOREVER if finished else self.ttl)
+            with self._lock:
+                self.fetches += 1
+        self._arrays[(season, gameweek)] = (array, None if finished else time.time() + self.ttl)
+        return array
+
+    def stats(self):
+        arrays = list(self._arrays.values())
+        return {'gameweeks': len(arrays), 'bytes': sum(array.nbytes for array, _ in arrays),
+                'fetches': self.fetches}
+
+
+store = LivePointsStore()
+
+
+def points(gameweek):
+    return store.points(gameweek)
+
+
+def stats():
+    return store.stats()
@@ -0,0 +1,164 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from storage import CACHE_DIR
+
+RESPONSE_CACHE_PATH = os.environ.get('FPL_RESPONSE_CACHE', os.path.join(CACHE_DIR, 'responses.sqlite'))
+RESPONSE_CACHE_MAX_MB = int(os.environ.get('FPL_RESPONSE_CACHE_MAX_MB', 256))
+# how long a manager's entry, history and transfers (which change with every gameweek and transfer) are reused
+MANAGER_TTL = int(os.environ.get('FPL_MANAGER_TTL', 120))
+
+FOREVER = None
+NO_CACHE = 0
+
+
+class DiskCache:
+    """
+    Size-bounded key/value cache in a SQLite file, shared by every worker process on the host and kept
+    across restarts. Entries carry an optional expiry; once the total size passes max_bytes the least
+    recently read entries are evicted. Hit/miss counters are per process.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, value BLOB, expires REAL, accessed REAL, size INTEGER)'
+        )
+        self._connect().execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+
+    def _connect(self):
+        # sqlite connections can't be shared between threads or carried across a fork (background
+        # jobs run in forked workers), so each thread of each process gets its own
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        """
+        Returns the stored bytes for key, or None if missing or expired.
+        """
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute('SELECT value, expires FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            self.misses += 1
+            return None
+        conn.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+        self.hits += 1
+        return row[0]
+
+    def set(self, key, value, ttl=FOREVER):
+        """
+        Stores bytes under key for ttl seconds (None keeps it until evicted), then evicts down to max_bytes.
+        """
+        conn = self._connect()
+        now = time.time()
+        expires = None if ttl is None else now + ttl
+        conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)', (key, value, expires, now, len(value)))
+        self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        conn.execute('DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?', (time.time(),))
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed').fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            total -= size
+
+    def stats(self):
+        entries, size = self._connect().execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'bytes': size,
+        }
+
+
+# Gameweeks whose data FPL has finalised (bootstrap-static events with data_checked), and the season they
+# belong to (the year of the first deadline), set by build.get_data. Gameweek numbers, manager ids and
+# player ids repeat every season, so cache keys carry the season.
+finished_gameweeks = set()
+season = ''
+
+
+def season_of(events):
+    return (events[0].get('deadline_time') or '')[:4] if events else ''
+
+
+def set_events(events):
+    global season
+    season = season_of(events)
+    finished_gameweeks.clear()
+    finished_gameweeks.update(event['id'] for event in events if event.get('data_checked'))
+
+
+def _finished_or(ttl):
+    """TTL policy for per-gameweek endpoints: finished gameweeks never change, anything else expires."""
+    return lambda match: FOREVER if int(match.group(1)) in finished_gameweeks else ttl
+
+
+# (url pattern, ttl) in match order; ttl is seconds, FOREVER, NO_CACHE or a function of the regex match
+TTL_POLICIES = [
+    (re.compile(r'/bootstrap-static/$'), 5 * 60),
+    (re.compile(r'/fixtures/\?event=(\d+)$'), _finished_or(60)),
+    (re.compile(r'/element-summary/\d+/$'), 60 * 60),
+    # a manager's picks for a finished gameweek are final, so reloading a known team only fetches newer ones
+    (re.compile(r'/entry/\d+/event/(\d+)/picks/$'), _finished_or(60)),
+    (re.compile(r'/entry/\d+/(history/|transfers/)?$'), MANAGER_TTL),
+]
+
+
+def ttl_for(url):
+    """
+    Returns how long a response for url may be cached, NO_CACHE if it must not be.
+    """
+    for pattern, ttl in TTL_POLICIES:
+        match = pattern.search(url)
+        if match:
+            return ttl(match) if callable(ttl) else ttl
+    return NO_CACHE
+
+
+responses = DiskCache(RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_MB * 1024 * 1024)
+
+
+def cached_json(url, fetch):
+    """
+    Returns the JSON for url from the response cache, calling fetch(url) and storing the result on a miss.
+    Entries are keyed by season as well as url, so last season's finished gameweeks are never served.
+    """
+    ttl = ttl_for(url)
+    if ttl == NO_CACHE:
+        return fetch(url)
+    key = f"{season}:{url}"
+    body = responses.get(key)
+    if body is not None:
+        return json.loads(body)
+    data = fetch(url)
+    responses.set(key, json.dumps(data).encode('utf-8'), ttl)
+    return data
+
+
+def stats():
+    return responses.stats()
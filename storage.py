@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import threading
+import boto3
+from botocore.exceptions import ClientError
+
+# FPL_STORAGE selects where build.py reads its snapshots from:
+#   s3    - straight from the bucket (default)
+#   local - from FPL_DATA_DIR, laid out like the bucket (e.g. the collector's --output-dir)
+#   cache - from S3 through a read-through disk cache in FPL_CACHE_DIR, revalidated by ETag
+STORAGE_MODE = os.environ.get('FPL_STORAGE', 's3')
+DATA_DIR = os.environ.get('FPL_DATA_DIR', 'data')
+CACHE_DIR = os.environ.get('FPL_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'fpl-dashboard-cache'))
+
+_storages = {}
+# boto3 clients must not be created on the default session from several threads at once, and get_data
+# opens player_data.json and lineups.json from parallel threads
+_storages_lock = threading.Lock()
+
+
+class S3Storage:
+    """Reads objects from an S3 bucket"""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.client = boto3.client('s3')
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+
+    def etag(self, key):
+        """Returns the object's ETag, or None if there is no such object"""
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)['ETag']
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return None
+            raise
+
+
+class LocalStorage:
+    """Reads objects from a local directory mirroring the bucket layout"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def etag(self, key):
+        """Returns a modified-time and size tag for the file, or None if there is no such file"""
+        try:
+            stat = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+class CachedStorage:
+    """
+    Read-through disk cache in front of another storage backend. Each open costs one ETag check
+    against the backend; the object itself is only downloaded when the ETag has changed.
+    """
+
+    def __init__(self, backend, cache_dir):
+        self.backend = backend
+        self.cache = LocalStorage(cache_dir)
+
+    def open(self, key):
+        path = self.cache.path(key)
+        etag_path = path + '.etag'
+        etag = self.backend.etag(key)
+
+        if os.path.exists(path) and os.path.exists(etag_path):
+            with open(etag_path) as f:
+                if f.read() == etag:
+                    return self.cache.open(key)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write to a temp file and rename so concurrent workers never read a half-written object
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f, self.backend.open(key) as body:
+            shutil.copyfileobj(body, f)
+        os.replace(tmp_path, path)
+        with open(etag_path, 'w') as f:
+            f.write(etag)
+        return self.cache.open(key)
+
+    def etag(self, key):
+        return self.backend.etag(key)
+
+
+def get_storage(bucket):
+    """
+    Returns the configured storage backend for a bucket.
+    """
+    with _storages_lock:
+        if bucket not in _storages:
+            if STORAGE_MODE == 'local':
+                _storages[bucket] = LocalStorage(DATA_DIR)
+            elif STORAGE_MODE == 'cache':
+                _storages[bucket] = CachedStorage(S3Storage(bucket), os.path.join(CACHE_DIR, bucket))
+            elif STORAGE_MODE == 's3':
+                _storages[bucket] = S3Storage(bucket)
+            else:
+                raise ValueError(f"Unknown FPL_STORAGE mode: {STORAGE_MODE}")
+        return _storages[bucket]
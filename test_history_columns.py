@@ -0,0 +1,45 @@
+"""
+Checks that the collector's gameweek partitions load into the same columns as player_data.json
+"""
+import numpy as np
+
+from data_collectors.get_player_history import to_columnar_partitions
+from history_columns import HISTORY_FIELDS, HistoryTable, concat_columns, history_columns, stored_columns
+
+
+def history_row(element, fixture, round, **stats):
+    row = {'element': element, 'fixture': fixture, 'round': round, 'opponent_team': 3, 'was_home': True,
+           'kickoff_time': f'2025-09-{round:02d}T14:00:00Z', 'total_points': 2, 'minutes': 90,
+           'expected_goals': '0.31', 'ict_index': '4.5', 'value': 55, 'selected': 1000, 'modified': False}
+    row.update(stats)
+    return row
+
+
+PLAYER_DATA = [
+    {'id': 1, 'history': [history_row(1, 10, 1), history_row(1, 20, 2, total_points=9, was_home=False)]},
+    # a blank row from the incremental collector, without starts and with no kickoff time
+    {'id': 2, 'history': [history_row(2, 10, 1, starts=1), history_row(2, 21, 2, kickoff_time=None, starts=None)]},
+    {'id': 3, 'history': []},
+]
+
+
+def test_partitions_load_like_player_data():
+    partitions = to_columnar_partitions(PLAYER_DATA)
+    stored = HistoryTable(concat_columns([stored_columns(table) for table in partitions.values()]))
+    parsed = HistoryTable(history_columns(PLAYER_DATA))
+
+    assert len(stored) == 4
+    for field in HISTORY_FIELDS:
+        assert stored.columns[field].dtype == parsed.columns[field].dtype, field
+        equal_nan = stored.columns[field].dtype.kind == 'f'
+        assert np.array_equal(stored.columns[field], parsed.columns[field], equal_nan=equal_nan), field
+    assert stored[(2, 21)]['starts'] == 0 and stored[(2, 21)]['kickoff_time'] == ''
+    assert stored[(1, 20)]['expected_goals'] == 0.31 and stored.last_round == 2
+
+
+def test_projection_and_no_partitions():
+    table = to_columnar_partitions(PLAYER_DATA)[2]
+    assert list(stored_columns(table, ('element', 'total_points'))) == ['element', 'total_points']
+
+    empty = HistoryTable(concat_columns([]))
+    assert len(empty) == 0 and empty.last_round == 0 and empty.get((1, 10)) is None
@@ -0,0 +1,76 @@
+"""
+Tests for the incremental collector's change detection and blank history rows
+"""
+from data_collectors.get_player_history import blank_history_rows, changed_player_ids, players_to_fetch
+
+
+def history_row(fixture, round, kickoff_time, **stats):
+    row = {'element': 7, 'fixture': fixture, 'round': round, 'kickoff_time': kickoff_time,
+           'opponent_team': 3, 'was_home': True, 'total_points': 2, 'minutes': 90,
+           'expected_goals': '0.31', 'value': 55, 'selected': 1000, 'modified': False}
+    row.update(stats)
+    return row
+
+
+def fixture(id, event, kickoff_time, team_h=1, team_a=2, finished=True):
+    return {'id': id, 'event': event, 'kickoff_time': kickoff_time, 'team_h': team_h, 'team_a': team_a,
+            'team_h_score': 1, 'team_a_score': 0, 'finished': finished}
+
+
+ELEMENT = {'id': 7, 'team': 1, 'now_cost': 56, 'selected_by_percent': '10.0',
+           'transfers_in_event': 30, 'transfers_out_event': 10}
+
+
+def test_blank_rows_keep_second_game_of_double_gameweek():
+    # the last run saw the first round 5 game; a second round 5 game and a round 6 game have finished since
+    history = [history_row(10, 5, '2025-09-20T14:00:00Z')]
+    fixtures = [fixture(10, 5, '2025-09-20T14:00:00Z'),
+                fixture(11, 5, '2025-09-23T19:00:00Z', team_h=4, team_a=1),
+                fixture(12, 6, '2025-09-27T14:00:00Z')]
+
+    rows = blank_history_rows(ELEMENT, history, fixtures, total_players=10000)
+
+    assert [row['fixture'] for row in rows] == [11, 12]
+    assert rows[0]['round'] == 5 and rows[0]['was_home'] is False and rows[0]['opponent_team'] == 4
+    assert rows[0]['minutes'] == 0 and rows[0]['total_points'] == 0 and rows[0]['expected_goals'] == '0.00'
+    assert rows[0]['value'] == 56 and rows[0]['selected'] == 1000 and rows[0]['transfers_balance'] == 20
+
+
+def test_blank_rows_skip_fixtures_before_signing_and_unfinished():
+    # signed after fixture 20; fixture 22 is another team's and fixture 23 hasn't finished
+    history = [history_row(21, 8, '2025-10-18T14:00:00Z')]
+    fixtures = [fixture(20, 7, '2025-10-04T14:00:00Z'),
+                fixture(21, 8, '2025-10-18T14:00:00Z'),
+                fixture(22, 9, '2025-10-25T14:00:00Z', team_h=5, team_a=6),
+                fixture(23, 9, '2025-10-25T16:30:00Z', finished=False)]
+
+    assert blank_history_rows(ELEMENT, history, fixtures, total_players=10000) == []
+
+
+def test_changed_player_ids():
+    previous = [{'id': 1, 'total_points': 10, 'minutes': 90, 'event_points': 2},
+                {'id': 2, 'total_points': 5, 'minutes': 45, 'event_points': 1},
+                {'id': 3, 'total_points': 0, 'minutes': 0, 'event_points': 0}]
+    elements = [{'id': 1, 'total_points': 10, 'minutes': 90, 'event_points': 2, 'now_cost': 60},
+                {'id': 2, 'total_points': 5, 'minutes': 60, 'event_points': 1},
+                {'id': 3, 'total_points': 0, 'minutes': 0, 'event_points': 0},
+                {'id': 4, 'total_points': 0, 'minutes': 0, 'event_points': 0}]
+
+    # untracked fields (now_cost) don't count; new players do
+    assert changed_player_ids(elements, previous) == [2, 4]
+    assert changed_player_ids(elements, []) == [1, 2, 3, 4]
+
+
+def test_players_to_fetch_includes_empty_histories():
+    # player 1 is unchanged, 2 changed, 3 is unchanged but had no history yet (pre-GW1 snapshot or new
+    # signing), 4 is new
+    previous_elements = [{'id': i, 'total_points': 0, 'minutes': 0, 'event_points': 0} for i in (1, 2, 3)]
+    elements = [{'id': 1, 'total_points': 0, 'minutes': 0, 'event_points': 0},
+                {'id': 2, 'total_points': 3, 'minutes': 90, 'event_points': 3},
+                {'id': 3, 'total_points': 0, 'minutes': 0, 'event_points': 0},
+                {'id': 4, 'total_points': 0, 'minutes': 0, 'event_points': 0}]
+    previous_data = [{'id': 1, 'history': [history_row(10, 5, '2025-09-20T14:00:00Z')]},
+                     {'id': 2, 'history': [history_row(10, 5, '2025-09-20T14:00:00Z')]},
+                     {'id': 3, 'history': []}]
+
+    assert players_to_fetch(elements, previous_elements, previous_data) == [2, 3, 4]
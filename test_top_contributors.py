@@ -0,0 +1,74 @@
+"""
+Checks the vectorized calculate_top_contributors against the original per-pick loop on random seasons
+"""
+import random
+
+import numpy as np
+
+from callbacks.team_callbacks import calculate_top_contributors
+
+
+def reference_top_contributors(transfers_data, player_lookup, all_gameweek_picks):
+    """The per-pick loop calculate_top_contributors replaced"""
+    player_timeline = {}
+    first_gw = min([gw_data['gameweek'] for gw_data in all_gameweek_picks]) if all_gameweek_picks else 1
+    for transfer in transfers_data:
+        element_in, element_out, event = transfer['element_in'], transfer['element_out'], transfer['event']
+        player_timeline[element_in] = {'in_gw': event, 'out_gw': None}
+        if element_out in player_timeline:
+            player_timeline[element_out]['out_gw'] = event
+        else:
+            player_timeline[element_out] = {'in_gw': first_gw, 'out_gw': event}
+
+    player_points = {}
+    for gw_data in all_gameweek_picks:
+        gw = gw_data['gameweek']
+        lookup = gw_data['player_points']
+        for pick in gw_data['picks']:
+            player_id = pick['element']
+            points = int(lookup[player_id]) if player_id < len(lookup) else 0
+            timeline = player_timeline.get(player_id)
+            if timeline is None or (gw >= timeline['in_gw'] and (timeline['out_gw'] is None or gw < timeline['out_gw'])):
+                player_points[player_id] = player_points.get(player_id, 0) + points * pick.get('multiplier', 1)
+
+    contributions = [{'name': player_lookup[player_id]['web_name'], 'total_points': total, 'player_id': player_id}
+                     for player_id, total in player_points.items() if player_id in player_lookup]
+    contributions.sort(key=lambda x: x['total_points'], reverse=True)
+    return contributions
+
+
+def random_season(seed, n_elements=800, n_gameweeks=38):
+    """A manager's season: 15 picks a week, 0-2 transfers a week, random live points"""
+    rnd = random.Random(seed)
+    squad = rnd.sample(range(1, n_elements + 1), 15)
+    picks, transfers = [], []
+    for gw in range(1, n_gameweeks + 1):
+        if gw > 1:
+            for _ in range(rnd.randint(0, 2)):
+                out = rnd.choice(squad)
+                player_in = rnd.choice(sorted(set(range(1, n_elements + 1)) - set(squad)))
+                squad[squad.index(out)] = player_in
+                transfers.insert(0, {'element_in': player_in, 'element_out': out, 'event': gw})
+        order = rnd.sample(squad, len(squad))
+        gw_picks = [{'element': element, 'position': i + 1, 'multiplier': 2 if i == 0 else (1 if i < 11 else 0)}
+                    for i, element in enumerate(order)]
+        # some gameweeks' live data stops short of the highest ids, which then score 0
+        n_live = n_elements + 1 if rnd.random() < 0.9 else rnd.randint(1, n_elements)
+        live = np.random.default_rng(seed * 100 + gw).integers(-2, 16, n_live).astype(np.int16)
+        picks.append({'gameweek': gw, 'picks': gw_picks, 'player_points': live})
+    # a few players are missing from the lookup and get skipped
+    lookup = {e: {'web_name': f'P{e}'} for e in range(1, n_elements + 1) if e % 50}
+    return transfers, lookup, picks
+
+
+def test_top_contributors_match_reference():
+    for seed in range(300):
+        transfers, lookup, picks = random_season(seed)
+        assert calculate_top_contributors(transfers, lookup, picks) == reference_top_contributors(transfers, lookup, picks)
+        # part of a season, and a season with no transfers
+        assert calculate_top_contributors(transfers, lookup, picks[:5]) == reference_top_contributors(transfers, lookup, picks[:5])
+        assert calculate_top_contributors([], lookup, picks[:3]) == reference_top_contributors([], lookup, picks[:3])
+
+
+def test_top_contributors_without_picks():
+    assert calculate_top_contributors([], {}, []) == []